@@ -41,6 +41,12 @@
 
 #include "random.h"
 
+#ifdef _WIN32
+#include <windows.h>
+#else
+#include <pthread.h>
+#endif
+
 /* For angle/distance interpolation ------------------------------- */
 
 typedef struct angle_distance_pair {
@@ -142,6 +148,17 @@ static double * double_alloc(int size)
     return (double *)safe_malloc(size * sizeof(double));
 }
 
+static double monotonic_seconds(void)
+{
+#ifdef _WIN32
+    return GetTickCount64() / 1000.;
+#else
+    struct timespec now;
+    clock_gettime(CLOCK_MONOTONIC, &now);
+    return now.tv_sec + now.tv_nsec / 1e9;
+#endif
+}
+
 static void
         swap(int * a, int * b)
 {
@@ -355,7 +372,8 @@ void
 
     int k = 0;
     
-    map->pixels = (pixel_t *)safe_malloc(npix * sizeof(pixel_t));
+    /* one spare pixel, the AVX2 kernel reads 32 bits at the last one */
+    map->pixels = (pixel_t *)safe_malloc((npix + 1) * sizeof(pixel_t));
     
     for (k=0; k<npix; ++k)
     {
@@ -459,6 +477,26 @@ void
     }
 }
 
+void
+        map_downsample(
+        map_t * map,
+        map_t * coarse)
+{
+    int x, y;
+    for (y=0; y<coarse->size_pixels; ++y)
+    {
+        pixel_t * row0 = map->pixels + 2 * y * map->size_pixels;
+        pixel_t * row1 = row0 + map->size_pixels;
+        pixel_t * coarse_row = coarse->pixels + y * coarse->size_pixels;
+
+        /* Each coarse pixel is the mean of a 2x2 block of pixels */
+        for (x=0; x<coarse->size_pixels; ++x)
+        {
+            coarse_row[x] = (row0[2*x] + row0[2*x+1] + row1[2*x] + row1[2*x+1] + 2) / 4;
+        }
+    }
+}
+
 void scan_init(
     scan_t * scan, 
     int span,
@@ -491,9 +529,9 @@ void scan_init(
     interp->angle_distance_pairs = (angle_distance_pair_t *)safe_malloc(size*sizeof(angle_distance_pair_t));
     scan->interpolation = interp;
     
-    /* assure size multiple of 4 for SSE */
-    scan->obst_x_mm = float_alloc(size*span+4);
-    scan->obst_y_mm = float_alloc(size*span+4);
+    /* assure size multiple of 8 for SIMD */
+    scan->obst_x_mm = float_alloc(size*span+8);
+    scan->obst_y_mm = float_alloc(size*span+8);
 }
 
 
@@ -582,15 +620,18 @@ scan_update(
     }
 }
 
-position_t
-        rmhc_position_search(
+/* One Random-Mutation Hill-Climbing search, stopped at the deadline in monotonic seconds if it is positive */
+static position_t
+        rmhc_climb(
         position_t start_pos,
         map_t * map,
         scan_t * scan,
         double sigma_xy_mm,
         double sigma_theta_degrees,
         int max_search_iter,
-        void * randomizer)
+        void * randomizer,
+        double deadline,
+        int * distance)
 {
     position_t currentpos = start_pos;
     position_t bestpos = start_pos;
@@ -602,9 +643,16 @@ position_t
     int last_lowest_distance = current_distance;
     
     int counter = 0;
+    int evaluations = 0;
     
     while (counter < max_search_iter)
     {
+        /* The clock is only read every 16 evaluations */
+        if (deadline > 0 && (++evaluations & 15) == 0 && monotonic_seconds() > deadline)
+        {
+            break;
+        }
+
         currentpos = lastbestpos;
         
         currentpos.x_mm = random_normal(randomizer, currentpos.x_mm, sigma_xy_mm);
@@ -638,5 +686,629 @@ position_t
         
     }
     
+    *distance = lowest_distance;
+
+    return bestpos;
+}
+
+position_t
+        rmhc_position_search(
+        position_t start_pos,
+        map_t * map,
+        scan_t * scan,
+        double sigma_xy_mm,
+        double sigma_theta_degrees,
+        int max_search_iter,
+        void * randomizer)
+{
+    int distance = 0;
+
+    return rmhc_climb(start_pos, map, scan, sigma_xy_mm, sigma_theta_degrees, max_search_iter, randomizer, 0,
+            &distance);
+}
+
+/* Arguments and result of one of the parallel climbs */
+typedef struct rmhc_search_t
+{
+    position_t start_pos;
+    map_t * map;
+    scan_t * scan;
+    double sigma_xy_mm;
+    double sigma_theta_degrees;
+    int max_search_iter;
+    void * randomizer;
+    double deadline;
+
+    position_t bestpos;
+    int distance;
+
+} rmhc_search_t;
+
+static void *
+        rmhc_search_run(
+        void * arg)
+{
+    rmhc_search_t * search = (rmhc_search_t *)arg;
+
+    search->bestpos = rmhc_climb(search->start_pos, search->map, search->scan, search->sigma_xy_mm,
+            search->sigma_theta_degrees, search->max_search_iter, search->randomizer, search->deadline,
+            &search->distance);
+
+    return NULL;
+}
+
+position_t
+        rmhc_position_search_parallel(
+        position_t start_pos,
+        map_t * map,
+        scan_t * scan,
+        double sigma_xy_mm,
+        double sigma_theta_degrees,
+        int max_search_iter,
+        void ** randomizers,
+        int nsearches,
+        double time_budget_seconds)
+{
+    rmhc_search_t * searches = (rmhc_search_t *)safe_malloc(nsearches * sizeof(rmhc_search_t));
+
+    double deadline = time_budget_seconds > 0 ? monotonic_seconds() + time_budget_seconds : 0;
+
+    int k = 0;
+    for (k=0; k<nsearches; ++k)
+    {
+        searches[k].start_pos = start_pos;
+        searches[k].map = map;
+        searches[k].scan = scan;
+        searches[k].sigma_xy_mm = sigma_xy_mm;
+        searches[k].sigma_theta_degrees = sigma_theta_degrees;
+        searches[k].max_search_iter = max_search_iter;
+        searches[k].randomizer = randomizers[k];
+        searches[k].deadline = deadline;
+    }
+
+#ifdef _WIN32
+
+    /* No threads here, the climbs share the time budget one after the other */
+    for (k=0; k<nsearches; ++k)
+    {
+        rmhc_search_run(&searches[k]);
+    }
+
+#else
+
+    /* The calling thread runs the first climb, each of the others gets its own thread */
+    pthread_t * threads = (pthread_t *)safe_malloc(nsearches * sizeof(pthread_t));
+    int * started = (int *)safe_malloc(nsearches * sizeof(int));
+
+    for (k=1; k<nsearches; ++k)
+    {
+        started[k] = !pthread_create(&threads[k], NULL, rmhc_search_run, &searches[k]);
+
+        /* Out of threads, the climb still runs, only not in parallel */
+        if (!started[k])
+        {
+            rmhc_search_run(&searches[k]);
+        }
+    }
+
+    rmhc_search_run(&searches[0]);
+
+    for (k=1; k<nsearches; ++k)
+    {
+        if (started[k])
+        {
+            pthread_join(threads[k], NULL);
+        }
+    }
+
+    free(threads);
+    free(started);
+
+#endif
+
+    /* Lowest distance wins, -1 being infinity; ties go to the first climb for reproducible results */
+    int best = 0;
+    for (k=1; k<nsearches; ++k)
+    {
+        if (searches[k].distance > -1 &&
+            (searches[best].distance == -1 || searches[k].distance < searches[best].distance))
+        {
+            best = k;
+        }
+    }
+
+    position_t bestpos = searches[best].bestpos;
+
+    free(searches);
+
+    return bestpos;
+}
+
+/* Branch-and-bound correlative scan matching --------------------- */
+
+typedef struct bnb_matcher_t
+{
+    double window_xy_mm;
+    double window_theta_degrees;
+    double angular_step_degrees;
+
+    /* Level k holds for each pixel the lowest map value in the 2^k x 2^k pixels from it, over a map padded
+       with NO_OBSTACLE so that every translation of every point in the window can be read without checks.
+       There are as many levels as needed for the last one to cover the whole window with a single square. */
+    pixel_t ** grids;
+    pixel_t * scratch;
+    int ngrids;
+    int size;
+    int pad;
+
+    /* Grid offsets of the obstacle points for each angle, and the cost of the points never on the map */
+    int * offsets;
+    int offsets_capacity;
+    int64_t * outside_costs;
+    int angles_capacity;
+
+} bnb_matcher_t;
+
+/* A square of translations of 2^level pixels from (x, y), at one angle */
+typedef struct bnb_candidate_t
+{
+    int angle;
+    int x;
+    int y;
+    int64_t score;
+
+    /* lowest distance of the square to the search start, in pixels and angle steps, to break ties */
+    int spread;
+
+} bnb_candidate_t;
+
+typedef struct bnb_search_t
+{
+    bnb_matcher_t * matcher;
+    int npoints;
+    int nangles;
+    int window;
+
+    bnb_candidate_t best;
+
+} bnb_search_t;
+
+void *
+        bnb_matcher_new(
+        double window_xy_mm,
+        double window_theta_degrees,
+        double angular_step_degrees)
+{
+    bnb_matcher_t * matcher = (bnb_matcher_t *)safe_malloc(sizeof(bnb_matcher_t));
+    memset(matcher, 0, sizeof(bnb_matcher_t));
+
+    matcher->window_xy_mm = window_xy_mm;
+    matcher->window_theta_degrees = window_theta_degrees;
+    matcher->angular_step_degrees = angular_step_degrees;
+
+    return matcher;
+}
+
+static void
+        bnb_free_grids(
+        bnb_matcher_t * matcher)
+{
+    int k;
+    for (k=0; k<matcher->ngrids; ++k)
+    {
+        free(matcher->grids[k]);
+    }
+
+    free(matcher->grids);
+    free(matcher->scratch);
+
+    matcher->grids = NULL;
+    matcher->scratch = NULL;
+    matcher->ngrids = 0;
+}
+
+void
+        bnb_matcher_free(
+        void * v)
+{
+    bnb_matcher_t * matcher = (bnb_matcher_t *)v;
+
+    bnb_free_grids(matcher);
+
+    free(matcher->offsets);
+    free(matcher->outside_costs);
+    free(matcher);
+}
+
+static void
+        bnb_alloc_grids(
+        bnb_matcher_t * matcher,
+        map_t * map,
+        int ngrids,
+        int pad)
+{
+    int size = map->size_pixels + 2 * pad;
+    size_t npix = (size_t)size * size;
+
+    if (ngrids != matcher->ngrids || size != matcher->size)
+    {
+        bnb_free_grids(matcher);
+
+        matcher->grids = (pixel_t **)safe_malloc(ngrids * sizeof(pixel_t *));
+
+        int k;
+        for (k=0; k<ngrids; ++k)
+        {
+            matcher->grids[k] = (pixel_t *)safe_malloc(npix * sizeof(pixel_t));
+        }
+
+        matcher->scratch = (pixel_t *)safe_malloc(npix * sizeof(pixel_t));
+        matcher->ngrids = ngrids;
+        matcher->size = size;
+    }
+
+    matcher->pad = pad;
+}
+
+/* Only the columns [x0, x1) and rows [y0, y1) of the grids are computed; the values of the last level are right
+   up to one window before the end of the region, those of the other levels are right where the last one needs */
+static void
+        bnb_update_grids(
+        bnb_matcher_t * matcher,
+        map_t * map,
+        int x0,
+        int x1,
+        int y0,
+        int y1)
+{
+    int size = matcher->size;
+    int pad = matcher->pad;
+    int width = x1 - x0;
+
+    /* Level 0 is the map, padded with free space */
+    pixel_t * grid = matcher->grids[0];
+
+    int x, y, k;
+    for (y=y0; y<y1; ++y)
+    {
+        pixel_t * row = grid + y * size;
+        int map_y = y - pad;
+
+        for (x=x0; x<x1; ++x)
+        {
+            int map_x = x - pad;
+
+            row[x] = map_x >= 0 && map_x < map->size_pixels && map_y >= 0 && map_y < map->size_pixels ?
+                map->pixels[map_y * map->size_pixels + map_x] : NO_OBSTACLE;
+        }
+    }
+
+    /* Each level doubles the window of the previous one, along X then Y */
+    for (k=1; k<matcher->ngrids; ++k)
+    {
+        pixel_t * finer = matcher->grids[k-1];
+        pixel_t * coarser = matcher->grids[k];
+        pixel_t * scratch = matcher->scratch;
+        int half = 1 << (k-1);
+
+        for (y=y0; y<y1; ++y)
+        {
+            pixel_t * row = finer + y * size;
+            pixel_t * out = scratch + y * size;
+
+            for (x=x0; x<x1-half; ++x)
+            {
+                out[x] = row[x] < row[x+half] ? row[x] : row[x+half];
+            }
+            for (; x<x1; ++x)
+            {
+                out[x] = row[x];
+            }
+        }
+
+        for (y=y0; y<y1-half; ++y)
+        {
+            pixel_t * row0 = scratch + y * size;
+            pixel_t * row1 = row0 + half * size;
+            pixel_t * out = coarser + y * size;
+
+            for (x=x0; x<x1; ++x)
+            {
+                out[x] = row0[x] < row1[x] ? row0[x] : row1[x];
+            }
+        }
+        for (; y<y1; ++y)
+        {
+            memcpy(coarser + y * size + x0, scratch + y * size + x0, width * sizeof(pixel_t));
+        }
+    }
+}
+
+static int64_t
+        bnb_score(
+        bnb_search_t * search,
+        int level,
+        int angle,
+        int x,
+        int y)
+{
+    bnb_matcher_t * matcher = search->matcher;
+
+    const pixel_t * grid = matcher->grids[level] + y * matcher->size + x;
+    const int * offsets = matcher->offsets + angle * search->npoints;
+
+    int64_t score = matcher->outside_costs[angle];
+
+    int i;
+    for (i=0; i<search->npoints; ++i)
+    {
+        if (offsets[i] >= 0)
+        {
+            score += grid[offsets[i]];
+        }
+    }
+
+    return score;
+}
+
+static int
+        bnb_candidate_compar(
+        const void * v1,
+        const void * v2)
+{
+    const bnb_candidate_t * c1 = (const bnb_candidate_t *)v1;
+    const bnb_candidate_t * c2 = (const bnb_candidate_t *)v2;
+
+    if (c1->score != c2->score)
+    {
+        return c1->score < c2->score ? -1 : 1;
+    }
+
+    return c1->spread - c2->spread;
+}
+
+static int
+        bnb_axis_spread(
+        int from,
+        int size)
+{
+    if (from > 0)
+    {
+        return from;
+    }
+
+    return from + size > 0 ? 0 : -(from + size - 1);
+}
+
+static void
+        bnb_candidate_set(
+        bnb_search_t * search,
+        bnb_candidate_t * candidate,
+        int level,
+        int angle,
+        int x,
+        int y)
+{
+    int size = 1 << level;
+
+    candidate->angle = angle;
+    candidate->x = x;
+    candidate->y = y;
+    candidate->score = bnb_score(search, level, angle, x, y);
+    candidate->spread = bnb_axis_spread(x, size) + bnb_axis_spread(y, size) + abs(angle - search->nangles / 2);
+}
+
+/* Depth-first search of the squares, best bound first, skipping the squares that cannot beat the best pose.
+   Among poses of the same score, the closest to the search start wins. */
+static void
+        bnb_branch(
+        bnb_search_t * search,
+        bnb_candidate_t * candidates,
+        int ncandidates,
+        int level)
+{
+    qsort(candidates, ncandidates, sizeof(bnb_candidate_t), bnb_candidate_compar);
+
+    int k;
+    for (k=0; k<ncandidates; ++k)
+    {
+        bnb_candidate_t * candidate = &candidates[k];
+
+        if (candidate->score > search->best.score ||
+            (candidate->score == search->best.score && candidate->spread >= search->best.spread))
+        {
+            break;
+        }
+
+        if (level == 0)
+        {
+            search->best = *candidate;
+            continue;
+        }
+
+        bnb_candidate_t children[4];
+        int nchildren = 0;
+        int half = 1 << (level-1);
+
+        int dx, dy;
+        for (dy=0; dy<=half; dy+=half)
+        {
+            for (dx=0; dx<=half; dx+=half)
+            {
+                if (candidate->x + dx <= search->window && candidate->y + dy <= search->window)
+                {
+                    bnb_candidate_set(search, &children[nchildren++], level-1, candidate->angle, 
+                            candidate->x + dx, candidate->y + dy);
+                }
+            }
+        }
+
+        bnb_branch(search, children, nchildren, level-1);
+    }
+}
+
+position_t
+        bnb_position_search(
+        position_t start_pos,
+        map_t * map,
+        scan_t * scan,
+        void * v)
+{
+    bnb_matcher_t * matcher = (bnb_matcher_t *)v;
+
+    double scale = map->scale_pixels_per_mm;
+
+    /* Translations in whole pixels, and enough levels for a single square to cover them */
+    int window = (int)ceil(matcher->window_xy_mm * scale);
+    int level = 0;
+    while ((1 << level) < 2 * window + 1)
+    {
+        ++level;
+    }
+
+    /* Points within the window of the map are in the padding, the others never hit the map */
+    int pad = 2 * window + 1;
+    bnb_alloc_grids(matcher, map, level+1, pad);
+
+    int npoints = 0;
+    double max_range_pixels = 0;
+
+    int i;
+    for (i=0; i<scan->npoints; ++i)
+    {
+        if (scan->value[i] == OBSTACLE)
+        {
+            double range_pixels = sqrt(scan->x_mm[i] * scan->x_mm[i] + scan->y_mm[i] * scan->y_mm[i]) * scale;
+            
+            if (range_pixels > max_range_pixels)
+            {
+                max_range_pixels = range_pixels;
+            }
+
+            npoints++;
+        }
+    }
+
+    /* By default, rotation steps move the farthest point by about one pixel */
+    double step_degrees = matcher->angular_step_degrees;
+    if (step_degrees <= 0)
+    {
+        step_degrees = max_range_pixels > 1 ? 
+            acos(1 - 1 / (2 * max_range_pixels * max_range_pixels)) * 180 / M_PI : matcher->window_theta_degrees;
+    }
+
+    int half_angles = step_degrees > 0 ? (int)ceil(matcher->window_theta_degrees / step_degrees) : 0;
+    int nangles = 2 * half_angles + 1;
+
+    if (nangles * npoints > matcher->offsets_capacity)
+    {
+        free(matcher->offsets);
+
+        matcher->offsets_capacity = nangles * npoints;
+        matcher->offsets = int_alloc(matcher->offsets_capacity);
+    }
+
+    if (nangles > matcher->angles_capacity)
+    {
+        free(matcher->outside_costs);
+
+        matcher->angles_capacity = nangles;
+        matcher->outside_costs = (int64_t *)safe_malloc(nangles * sizeof(int64_t));
+    }
+
+    /* Points rotated at each angle and rounded to pixels like in distance_scan_to_map */
+    double pos_x_pix = start_pos.x_mm * scale;
+    double pos_y_pix = start_pos.y_mm * scale;
+
+    int size = matcher->size;
+    int low = window - pad;
+    int high = map->size_pixels + pad - window;
+
+    /* Bounding box of the points on the grids, over all angles */
+    int min_x = high, max_x = low - 1;
+    int min_y = high, max_y = low - 1;
+
+    int a;
+    for (a=0; a<nangles; ++a)
+    {
+        double theta = radians(start_pos.theta_degrees + (a - half_angles) * step_degrees);
+        double costheta = cos(theta) * scale;
+        double sintheta = sin(theta) * scale;
+
+        int * offsets = matcher->offsets + a * npoints;
+        int64_t outside_cost = 0;
+        int j = 0;
+
+        for (i=0; i<scan->npoints; ++i)
+        {
+            if (scan->value[i] == OBSTACLE)
+            {
+                int x = floor(pos_x_pix + costheta * scan->x_mm[i] - sintheta * scan->y_mm[i] + 0.5);
+                int y = floor(pos_y_pix + sintheta * scan->x_mm[i] + costheta * scan->y_mm[i] + 0.5);
+
+                /* Offsets are from the square of no translation, window pixels before the point */
+                if (x >= low && x < high && y >= low && y < high)
+                {
+                    offsets[j] = (y + pad) * size + (x + pad);
+
+                    min_x = x < min_x ? x : min_x;
+                    max_x = x > max_x ? x : max_x;
+                    min_y = y < min_y ? y : min_y;
+                    max_y = y > max_y ? y : max_y;
+                }
+                else
+                {
+                    offsets[j] = -1;
+                    outside_cost += NO_OBSTACLE;
+                }
+
+                j++;
+            }
+        }
+
+        matcher->outside_costs[a] = outside_cost;
+    }
+
+    /* The grids are only needed over the translations of the points, plus the window of the top level */
+    if (min_x <= max_x)
+    {
+        int extent = 1 << level;
+        int x1 = max_x + pad + window + extent;
+        int y1 = max_y + pad + window + extent;
+
+        bnb_update_grids(matcher, map, min_x + pad - window, x1 < size ? x1 : size,
+                min_y + pad - window, y1 < size ? y1 : size);
+    }
+
+    bnb_search_t search;
+    search.matcher = matcher;
+    search.npoints = npoints;
+    search.nangles = nangles;
+    search.window = window;
+
+    /* Nothing found yet */
+    search.best.score = INT64_MAX;
+    search.best.spread = 0;
+    search.best.angle = half_angles;
+    search.best.x = 0;
+    search.best.y = 0;
+
+    /* One square per angle at the top level covers the whole window */
+    bnb_candidate_t * candidates = (bnb_candidate_t *)safe_malloc(nangles * sizeof(bnb_candidate_t));
+
+    for (a=0; a<nangles; ++a)
+    {
+        bnb_candidate_set(&search, &candidates[a], level, a, -window, -window);
+    }
+
+    bnb_branch(&search, candidates, nangles, level);
+
+    free(candidates);
+
+    position_t bestpos = start_pos;
+    bestpos.x_mm += search.best.x / scale;
+    bestpos.y_mm += search.best.y / scale;
+    bestpos.theta_degrees += (search.best.angle - half_angles) * step_degrees;
+
     return bestpos;
 }
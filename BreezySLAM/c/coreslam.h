@@ -152,6 +152,12 @@ void
 map_set(
     map_t * map, 
     char * bytes);
+
+/* Fills a map of half the size, covering the same area, with the mean of each 2x2 block of pixels */
+void
+map_downsample(
+    map_t * map,
+    map_t * coarse);
     
 /* Returns -1 for infinity */
 int 
@@ -172,7 +178,59 @@ rmhc_position_search(
 	int max_search_iter,
 	void * randomizer);
 
-#ifdef __cplusplus 
+/* One independent RMHC search per randomizer, run in parallel threads; the lowest distance wins.
+   A positive time budget stops all searches at that many seconds after the call. */
+position_t
+rmhc_position_search_parallel(
+    position_t start_pos,
+    map_t * map,
+    scan_t * scan,
+    double sigma_xy_mm,
+    double sigma_theta_degrees,
+    int max_search_iter,
+    void ** randomizers,
+    int nsearches,
+    double time_budget_seconds);
+
+/* Branch-and-bound correlative scan matcher: grids and buffers kept between searches.
+   A non-positive angular step is computed for each scan, so that its farthest point moves by about one pixel. */
+void *
+bnb_matcher_new(
+    double window_xy_mm,
+    double window_theta_degrees,
+    double angular_step_degrees);
+
+void
+bnb_matcher_free(
+    void * matcher);
+
+/* Returns the position of lowest map values under the scan obstacle points, points off the map counting as
+   free space, among translations of whole pixels and rotations of whole angular steps within the window */
+position_t
+bnb_position_search(
+    position_t start_pos,
+    map_t * map,
+    scan_t * scan,
+    void * matcher);
+
+/* Runtime selection of the distance_scan_to_map kernel, built with CORESLAM_RUNTIME_DISPATCH */
+int
+distance_kernel_count(void);
+
+/* Returns NULL for an index out of range or a kernel the CPU does not support */
+const char *
+distance_kernel_name(
+    int index);
+
+const char *
+distance_kernel_selected(void);
+
+/* NULL selects the fastest kernel supported; returns -1 for an unknown or unsupported kernel */
+int
+distance_kernel_select(
+    const char * name);
+
+#ifdef __cplusplus
 }
 #endif
 
@@ -0,0 +1,115 @@
+/*
+coreslam_aarch64.c ARMv8 Advanced SIMD (NEON) acceleration for CoreSLAM
+
+Four obstacle points are rotated / translated and checked against the map bounds at once. NEON has no gather, so
+the map pixels are then fetched one by one, without branches.
+
+Copyright (C) 2014 Simon D. Levy
+
+This code is free software: you can redistribute it and/or modify
+it under the terms of the GNU Lesser General Public License as
+published by the Free Software Foundation, either version 3 of the
+License, or (at your option) any later version.
+
+This code is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License
+along with this code.  If not, see <http:#www.gnu.org/licenses/>.
+*/
+
+
+#include <stdint.h>
+#include <math.h>
+
+#include <arm_neon.h>
+
+#include "coreslam.h"
+#include "coreslam_internals.h"
+
+#ifdef CORESLAM_RUNTIME_DISPATCH
+#define distance_scan_to_map distance_scan_to_map_aarch64
+#endif
+
+/* Performs one rotation/translation, rounding to the nearest pixel like the SISD kernel */
+static int32x4_t
+neon_coord_4(
+    float32x4_t a_4,
+    float32x4_t b_4,
+    float32x4_t x_4,
+    float32x4_t y_4,
+    float32x4_t pos_4)
+{
+    float32x4_t c_4 = vmlaq_f32(vmulq_f32(a_4, x_4), b_4, y_4);
+    return vcvtmq_s32_f32(vaddq_f32(c_4, pos_4));
+}
+
+int
+distance_scan_to_map(
+    map_t *  map,
+    scan_t * scan,
+    position_t position)
+{
+    /* Pre-compute sine and cosine of angle for rotation */
+    double position_theta_radians = radians(position.theta_degrees);
+    double costheta = cos(position_theta_radians) * map->scale_pixels_per_mm;
+    double sintheta = sin(position_theta_radians) * map->scale_pixels_per_mm;
+
+    /* Pre-compute pixel offset for translation, with the half pixel for rounding */
+    double pos_x_pix = position.x_mm * map->scale_pixels_per_mm + 0.5;
+    double pos_y_pix = position.y_mm * map->scale_pixels_per_mm + 0.5;
+
+    float32x4_t costheta_4  = vdupq_n_f32(costheta);
+    float32x4_t sintheta_4  = vdupq_n_f32(sintheta);
+    float32x4_t nsintheta_4 = vdupq_n_f32(-sintheta);
+
+    float32x4_t pos_x_4 = vdupq_n_f32(pos_x_pix);
+    float32x4_t pos_y_4 = vdupq_n_f32(pos_y_pix);
+
+    uint32x4_t size_4 = vdupq_n_u32(map->size_pixels);
+    uint32x4_t obst_4 = vdupq_n_u32(scan->obst_npoints);
+
+    static const uint32_t lanes[4] = {0, 1, 2, 3};
+    uint32x4_t lanes_4 = vld1q_u32(lanes);
+
+    int64_t sum = 0; /* sum of map values at those points */
+
+    /* Number of points where scan matches map, per lane */
+    uint32x4_t npoints_4 = vdupq_n_u32(0);
+
+    /* Stride by 4 over obstacle points in scan, the obstacle arrays are padded for the last stride */
+    int i = 0;
+    for (i=0; i<scan->obst_npoints; i+=4)
+    {
+        float32x4_t scan_x_4 = vld1q_f32(&scan->obst_x_mm[i]);
+        float32x4_t scan_y_4 = vld1q_f32(&scan->obst_y_mm[i]);
+
+        /* Compute X and Y coordinates of 4 rotated / translated points at once */
+        uint32x4_t x_4 = vreinterpretq_u32_s32(neon_coord_4(costheta_4, nsintheta_4, scan_x_4, scan_y_4, pos_x_4));
+        uint32x4_t y_4 = vreinterpretq_u32_s32(neon_coord_4(sintheta_4, costheta_4,  scan_x_4, scan_y_4, pos_y_4));
+
+        /* Keep points of the scan that are in map bounds, negative coordinates are huge once unsigned */
+        uint32x4_t mask_4 = vcltq_u32(vaddq_u32(vdupq_n_u32(i), lanes_4), obst_4);
+        mask_4 = vandq_u32(mask_4, vcltq_u32(x_4, size_4));
+        mask_4 = vandq_u32(mask_4, vcltq_u32(y_4, size_4));
+
+        /* Points out of bounds read the first pixel, which the mask then discards */
+        uint32_t offsets[4];
+        uint32_t masks[4];
+        vst1q_u32(offsets, vandq_u32(vmlaq_u32(x_4, y_4, size_4), mask_4));
+        vst1q_u32(masks, mask_4);
+
+        sum += (map->pixels[offsets[0]] & masks[0]) + (map->pixels[offsets[1]] & masks[1])
+             + (map->pixels[offsets[2]] & masks[2]) + (map->pixels[offsets[3]] & masks[3]);
+
+        /* Lanes of the mask are all ones for the points kept */
+        npoints_4 = vsubq_u32(npoints_4, mask_4);
+    }
+
+    int npoints = vaddvq_u32(npoints_4);
+
+    /* Return sum scaled by number of points, or -1 if none */
+    return npoints ? (int)(sum * 1024 / npoints) : -1;
+}
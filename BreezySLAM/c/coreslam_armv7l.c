@@ -32,6 +32,10 @@ typedef __int64 int64_t;       /* Define it from MSVC's internal type */
 #include "coreslam.h"
 #include "coreslam_internals.h"
 
+#ifdef CORESLAM_RUNTIME_DISPATCH
+#define distance_scan_to_map distance_scan_to_map_armv7l
+#endif
+
 /* Performs one rotation/translation */
 static void 
 neon_coord_4(
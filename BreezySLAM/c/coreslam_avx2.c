@@ -0,0 +1,143 @@
+/*
+coreslam_avx2.c Intel Advanced Vector Extensions 2 for CoreSLAM
+
+Eight obstacle points are rotated / translated at once, and their map pixels are fetched with a single masked gather.
+
+Copyright (C) 2014 Simon D. Levy
+
+This code is free software: you can redistribute it and/or modify
+it under the terms of the GNU Lesser General Public License as
+published by the Free Software Foundation, either version 3 of the
+License, or (at your option) any later version.
+
+This code is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License
+along with this code.  If not, see <http:#www.gnu.org/licenses/>.
+
+*/
+
+
+#ifdef _MSC_VER
+typedef __int64 int64_t;       /* Define it from MSVC's internal type */
+#else
+#include <stdint.h>            /* Use the C99 official header */
+#endif
+
+#include <math.h>
+
+#include "coreslam.h"
+#include "coreslam_internals.h"
+
+#include <immintrin.h>
+
+#ifdef CORESLAM_RUNTIME_DISPATCH
+#define distance_scan_to_map distance_scan_to_map_avx2
+#endif
+
+/* The kernel is compiled for AVX2 whatever the flags of the rest of the build, so that it can be picked at runtime */
+#if defined(__GNUC__) && !defined(__AVX2__)
+#define AVX2_TARGET __attribute__((target("avx2")))
+#else
+#define AVX2_TARGET
+#endif
+
+/* Performs one rotation/translation, rounding to the nearest pixel like the SISD kernel */
+static AVX2_TARGET __m256i
+avx2_coord_8(
+    __m256 a_8,
+    __m256 b_8,
+    __m256 x_8,
+    __m256 y_8,
+    __m256 pos_8)
+{
+    __m256 c_8 = _mm256_add_ps(_mm256_mul_ps(a_8, x_8), _mm256_mul_ps(b_8, y_8));
+    return _mm256_cvttps_epi32(_mm256_floor_ps(_mm256_add_ps(c_8, pos_8)));
+}
+
+AVX2_TARGET int
+distance_scan_to_map(
+    map_t *  map,
+    scan_t * scan,
+    position_t position)
+{
+    /* Pre-compute sine and cosine of angle for rotation */
+    double position_theta_radians = radians(position.theta_degrees);
+    double costheta = cos(position_theta_radians) * map->scale_pixels_per_mm;
+    double sintheta = sin(position_theta_radians) * map->scale_pixels_per_mm;
+
+    /* Pre-compute pixel offset for translation, with the half pixel for rounding */
+    double pos_x_pix = position.x_mm * map->scale_pixels_per_mm + 0.5;
+    double pos_y_pix = position.y_mm * map->scale_pixels_per_mm + 0.5;
+
+    __m256 costheta_8  = _mm256_set1_ps(costheta);
+    __m256 sintheta_8  = _mm256_set1_ps(sintheta);
+    __m256 nsintheta_8 = _mm256_set1_ps(-sintheta);
+
+    __m256 pos_x_8 = _mm256_set1_ps(pos_x_pix);
+    __m256 pos_y_8 = _mm256_set1_ps(pos_y_pix);
+
+    __m256i size_8      = _mm256_set1_epi32(map->size_pixels);
+    __m256i minus_one_8 = _mm256_set1_epi32(-1);
+    __m256i obst_8      = _mm256_set1_epi32(scan->obst_npoints);
+    __m256i lanes_8     = _mm256_setr_epi32(0, 1, 2, 3, 4, 5, 6, 7);
+    __m256i low_16_8    = _mm256_set1_epi32(0xFFFF);
+
+    /* Sums are kept on 64 bits like in the SISD kernel */
+    __m256i sum_4 = _mm256_setzero_si256();
+
+    /* Number of points where scan matches map, per lane */
+    __m256i npoints_8 = _mm256_setzero_si256();
+
+    /* Stride by 8 over obstacle points in scan, the obstacle arrays are padded for the last stride */
+    int i = 0;
+    for (i=0; i<scan->obst_npoints; i+=8)
+    {
+        __m256 scan_x_8 = _mm256_loadu_ps(&scan->obst_x_mm[i]);
+        __m256 scan_y_8 = _mm256_loadu_ps(&scan->obst_y_mm[i]);
+
+        /* Compute X and Y coordinates of 8 rotated / translated points at once */
+        __m256i x_8 = avx2_coord_8(costheta_8, nsintheta_8, scan_x_8, scan_y_8, pos_x_8);
+        __m256i y_8 = avx2_coord_8(sintheta_8, costheta_8,  scan_x_8, scan_y_8, pos_y_8);
+
+        /* Keep points of the scan that are in map bounds */
+        __m256i mask_8 = _mm256_cmpgt_epi32(obst_8, _mm256_add_epi32(_mm256_set1_epi32(i), lanes_8));
+        mask_8 = _mm256_and_si256(mask_8, _mm256_cmpgt_epi32(x_8, minus_one_8));
+        mask_8 = _mm256_and_si256(mask_8, _mm256_cmpgt_epi32(size_8, x_8));
+        mask_8 = _mm256_and_si256(mask_8, _mm256_cmpgt_epi32(y_8, minus_one_8));
+        mask_8 = _mm256_and_si256(mask_8, _mm256_cmpgt_epi32(size_8, y_8));
+
+        /* Gather 32 bits at each 16-bit pixel, the map has a spare pixel for the last one */
+        __m256i offset_8 = _mm256_add_epi32(_mm256_mullo_epi32(y_8, size_8), x_8);
+        __m256i pixels_8 = _mm256_mask_i32gather_epi32(_mm256_setzero_si256(), (const int *)map->pixels,
+                                                       offset_8, mask_8, 2);
+        pixels_8 = _mm256_and_si256(pixels_8, low_16_8);
+
+        sum_4 = _mm256_add_epi64(sum_4, _mm256_cvtepu32_epi64(_mm256_castsi256_si128(pixels_8)));
+        sum_4 = _mm256_add_epi64(sum_4, _mm256_cvtepu32_epi64(_mm256_extracti128_si256(pixels_8, 1)));
+
+        /* Lanes of the mask are -1 for the points kept */
+        npoints_8 = _mm256_sub_epi32(npoints_8, mask_8);
+    }
+
+    int64_t sums[4];
+    _mm256_storeu_si256((__m256i *)sums, sum_4);
+
+    int counts[8];
+    _mm256_storeu_si256((__m256i *)counts, npoints_8);
+
+    int64_t sum = sums[0] + sums[1] + sums[2] + sums[3];
+    int npoints = 0;
+
+    int k = 0;
+    for (k=0; k<8; ++k)
+    {
+        npoints += counts[k];
+    }
+
+    /* Return sum scaled by number of points, or -1 if none */
+    return npoints ? (int)(sum * 1024 / npoints) : -1;
+}
@@ -0,0 +1,166 @@
+/*
+coreslam_dispatch.c Runtime selection of the distance_scan_to_map kernel for CoreSLAM
+
+Built with CORESLAM_RUNTIME_DISPATCH, every kernel file compiled for the target provides its own
+distance_scan_to_map_<name>, and the fastest one supported by the CPU is picked on first use.
+
+Copyright (C) 2014 Simon D. Levy
+
+This code is free software: you can redistribute it and/or modify
+it under the terms of the GNU Lesser General Public License as
+published by the Free Software Foundation, either version 3 of the
+License, or (at your option) any later version.
+
+This code is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License
+along with this code.  If not, see <http:#www.gnu.org/licenses/>.
+*/
+
+
+#include <string.h>
+
+#include "coreslam.h"
+
+#if defined(__aarch64__) && defined(__linux__)
+#include <sys/auxv.h>
+#include <asm/hwcap.h>
+#endif
+
+typedef int (*distance_kernel_t)(map_t * map, scan_t * scan, position_t position);
+
+int distance_scan_to_map_sisd(map_t * map, scan_t * scan, position_t position);
+
+#if defined(__i386__) || defined(__x86_64__)
+int distance_scan_to_map_sse3(map_t * map, scan_t * scan, position_t position);
+int distance_scan_to_map_avx2(map_t * map, scan_t * scan, position_t position);
+#endif
+
+#if defined(__aarch64__)
+int distance_scan_to_map_aarch64(map_t * map, scan_t * scan, position_t position);
+#elif defined(__ARM_NEON)
+int distance_scan_to_map_armv7l(map_t * map, scan_t * scan, position_t position);
+#endif
+
+typedef struct distance_kernel_entry_t
+{
+    const char * name;
+    distance_kernel_t kernel;
+
+} distance_kernel_entry_t;
+
+/* Kernels compiled for the target, slowest first */
+static const distance_kernel_entry_t kernels[] =
+{
+    {"sisd", distance_scan_to_map_sisd},
+
+#if defined(__i386__) || defined(__x86_64__)
+    {"sse3", distance_scan_to_map_sse3},
+    {"avx2", distance_scan_to_map_avx2},
+#endif
+
+#if defined(__aarch64__)
+    {"aarch64", distance_scan_to_map_aarch64},
+#elif defined(__ARM_NEON)
+    {"armv7l", distance_scan_to_map_armv7l},
+#endif
+};
+
+static const int nkernels = sizeof(kernels) / sizeof(kernels[0]);
+
+/* Index of the kernel in use, -1 until the first call */
+static int selected = -1;
+
+static int
+kernel_supported(
+    const char * name)
+{
+#if defined(__i386__) || defined(__x86_64__)
+    if (!strcmp(name, "sse3"))
+    {
+        return __builtin_cpu_supports("sse3");
+    }
+    if (!strcmp(name, "avx2"))
+    {
+        return __builtin_cpu_supports("avx2");
+    }
+#endif
+
+#if defined(__aarch64__) && defined(__linux__)
+    if (!strcmp(name, "aarch64"))
+    {
+        return (getauxval(AT_HWCAP) & HWCAP_ASIMD) != 0;
+    }
+#endif
+
+    return 1;
+}
+
+int
+distance_kernel_count(void)
+{
+    return nkernels;
+}
+
+const char *
+distance_kernel_name(
+    int index)
+{
+    return index >= 0 && index < nkernels && kernel_supported(kernels[index].name) ? kernels[index].name : NULL;
+}
+
+const char *
+distance_kernel_selected(void)
+{
+    if (selected < 0)
+    {
+        distance_kernel_select(NULL);
+    }
+
+    return kernels[selected].name;
+}
+
+int
+distance_kernel_select(
+    const char * name)
+{
+    int k = 0;
+
+    /* Without a name, the last supported kernel is the fastest */
+    if (name == NULL)
+    {
+        for (k=nkernels-1; k>0 && !kernel_supported(kernels[k].name); --k)
+            ;
+
+        selected = k;
+        return 0;
+    }
+
+    for (k=0; k<nkernels; ++k)
+    {
+        if (!strcmp(name, kernels[k].name) && kernel_supported(name))
+        {
+            selected = k;
+            return 0;
+        }
+    }
+
+    return -1;
+}
+
+int
+distance_scan_to_map(
+    map_t *  map,
+    scan_t * scan,
+    position_t position)
+{
+    if (selected < 0)
+    {
+        distance_kernel_select(NULL);
+    }
+
+    return kernels[selected].kernel(map, scan, position);
+}
@@ -45,6 +45,10 @@ typedef __int64 int64_t;       /* Define it from MSVC's internal type */
 #include <xmmintrin.h>
 #include <mmintrin.h>
 
+#ifdef CORESLAM_RUNTIME_DISPATCH
+#define distance_scan_to_map distance_scan_to_map_sse3
+#endif
+
 /* This structure supports extracting two 32-bit integer coordinates from a 64-bit register */
 typedef union 
 {
@@ -28,6 +28,10 @@ along with this code.  If not, see <http:#www.gnu.org/licenses/>.
 #include "coreslam.h"
 #include "coreslam_internals.h"
 
+#ifdef CORESLAM_RUNTIME_DISPATCH
+#define distance_scan_to_map distance_scan_to_map_sisd
+#endif
+
 int 
 distance_scan_to_map(
     map_t *  map,
@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+
+'''
+bnbcheck.py - Checks that the branch-and-bound scan matcher finds the true position anywhere in its window.
+
+Builds a map from simulated scans of a room at known positions, then searches a new scan from starting positions
+that put the true one at the corners of the search window, for the default window and for a window wider than
+1024 pixels. The position found must be the true one, to a pixel and an angular step.
+
+Usage: python bnbcheck.py
+'''
+
+import sys
+import time
+
+import numpy as np
+
+import pybreezyslam
+
+from breezyslam.algorithms import Deterministic_SLAM
+from breezyslam.sensors import Laser
+
+from roomsim import simulated_scan
+
+MAP_SIZE_PIXELS = 200
+MAP_SIZE_METERS = 10
+
+# windows as (translation in millimeters, rotation in degrees, angular step in degrees)
+WINDOWS = [(200, 20, 2), (30000, 4, 2)]
+
+def main():
+
+    laser = Laser(360, 5, 360, 4000, 0, 0)
+
+    slam = Deterministic_SLAM(laser, MAP_SIZE_PIXELS, MAP_SIZE_METERS)
+
+    # a map integrated from a few scans, the pose of the robot known
+    for k in range(20):
+        x, y, theta = 2500 + 100 * k, 3000 + 50 * k, 5 * k
+        slam.position = pybreezyslam.Position(x, y, theta)
+        slam.update(simulated_scan(laser, x, y, theta), (0, 0, 0))
+
+    # the true position, on whole pixels
+    pixel_mm = MAP_SIZE_METERS * 1000. / MAP_SIZE_PIXELS
+    x, y, theta = 4000, 5000, 30
+
+    scan = pybreezyslam.Scan(laser, 1)
+    scan.update(scans_mm=simulated_scan(laser, x, y, theta), hole_width_mm=600, velocities=(0, 0),
+                scan_angles_degrees=None)
+
+    failures = 0
+
+    for window_xy_mm, window_theta_degrees, angular_step_degrees in WINDOWS:
+
+        matcher = pybreezyslam.ScanMatcher(window_xy_mm, window_theta_degrees, angular_step_degrees)
+
+        # the farthest whole pixel and angular step from the start within the window
+        window = int(np.ceil(window_xy_mm / pixel_mm))
+        steps = int(np.ceil(window_theta_degrees / angular_step_degrees))
+
+        for sx, sy, st in ((1, 1, 1), (-1, 1, -1), (1, -1, 1), (-1, -1, -1)):
+
+            start = pybreezyslam.Position(x - sx * window * pixel_mm, y - sy * window * pixel_mm,
+                                          theta - st * steps * angular_step_degrees)
+
+            begin = time.perf_counter()
+            found = pybreezyslam.bnbPositionSearch(start, slam.map, scan, matcher)
+            elapsed = time.perf_counter() - begin
+
+            error_pixels = max(abs(found.x_mm - x), abs(found.y_mm - y)) / pixel_mm
+            error_steps = abs(found.theta_degrees - theta) / angular_step_degrees
+
+            ok = error_pixels <= 1 and error_steps <= 1
+
+            print('window %5d px %2d steps | true position %+5d %+5d px %+3d steps from the start | '
+                  'error %6.1f px %4.1f steps | %7.1f ms | %s' %
+                  (window, steps, sx * window, sy * window, st * steps, error_pixels, error_steps, elapsed * 1000,
+                   'ok' if ok else 'FAILED'))
+
+            failures += not ok
+
+    if failures:
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -33,6 +33,16 @@ _DEFAULT_SIGMA_XY_MM         = 100
 _DEFAULT_SIGMA_THETA_DEGREES = 20
 _DEFAULT_MAX_SEARCH_ITER     = 1000
 
+# Coarse-to-fine params: RMHC at each level of the map pyramid, from the coarsest one
+_DEFAULT_PYRAMID_LEVELS             = 2
+_DEFAULT_COARSE_SIGMA_XY_MM         = 100
+_DEFAULT_COARSE_SIGMA_THETA_DEGREES = 40
+_DEFAULT_LEVEL_SEARCH_ITER          = 200
+
+# Branch-and-bound params: search window around the start position
+_DEFAULT_WINDOW_XY_MM               = 200
+_DEFAULT_WINDOW_THETA_DEGREES       = 20
+
 # CoreSLAM class ------------------------------------------------------------------------------------------------------
 
 class CoreSLAM(object):
@@ -90,9 +100,10 @@ class CoreSLAM(object):
         the specified pose change.
          
         scan_mm is a list of Lidar scan values, whose count is specified in the scan_size 
-        attribute of the Laser object passed to the CoreSlam constructor
+        attribute of the Laser object passed to the CoreSlam constructor; a one-dimensional
+        NumPy array (or any buffer of numbers) is accepted as well
         pose_change is a tuple (dxy_mm, dtheta_degrees, dt_seconds) computed from odometry
-        scan_angles_degrees is an optional list of angles corresponding to the distances in scans_mm
+        scan_angles_degrees is an optional list (or array) of angles corresponding to the distances in scans_mm
         should_update_map flags for whether you want to update the map
         '''
 
@@ -112,9 +123,17 @@ class CoreSLAM(object):
     def getmap(self, mapbytes):
         '''
         Fills bytearray mapbytes with current map pixels, where bytearray length is square of map size passed
-        to CoreSLAM.__init__().
+        to CoreSLAM.__init__().  Any writable contiguous buffer of that length, e.g. a NumPy uint8 array, 
+        is accepted as well.
         '''
         self.map.get(mapbytes)
+
+    def getmapview(self):
+        '''
+        Returns a read-only memoryview of the current map pixels, without copying them: a square of 16-bit
+        values whose high byte is what getmap() returns.  The view follows the map as it is updated.
+        '''
+        return memoryview(self.map)
         
         
     def setmap(self, mapbytes):
@@ -222,7 +241,7 @@ class RMHC_SLAM(SinglePositionSLAM):
     def __init__(self, laser, map_size_pixels, map_size_meters, 
                 map_quality=_DEFAULT_MAP_QUALITY, hole_width_mm=_DEFAULT_HOLE_WIDTH_MM,
                 random_seed=None, sigma_xy_mm=_DEFAULT_SIGMA_XY_MM, sigma_theta_degrees=_DEFAULT_SIGMA_THETA_DEGREES, 
-                max_search_iter=_DEFAULT_MAX_SEARCH_ITER):
+                max_search_iter=_DEFAULT_MAX_SEARCH_ITER, search_threads=1, max_search_seconds=None):
         '''
         Creates a RMHCSlam object suitable for updating with new Lidar and odometry data.
         laser is a Laser object representing the specifications of your Lidar unit
@@ -236,6 +255,10 @@ class RMHC_SLAM(SinglePositionSLAM):
         sigma_theta_degrees specifies the standard deviation in degrees of the normal distribution of 
            the rotational component of position for RMHC search
         max_search_iter specifies the maximum number of iterations for RMHC search
+        search_threads runs that many independent RMHC searches in parallel threads, from different seeds,
+           and keeps the best position found
+        max_search_seconds bounds the wall-clock time of the search, e.g. to keep up with the scan rate; 
+           the best position found so far is kept when it runs out
         '''
     
         SinglePositionSLAM.__init__(self, laser, map_size_pixels, map_size_meters, 
@@ -245,10 +268,15 @@ class RMHC_SLAM(SinglePositionSLAM):
             random_seed = int(time.time()) & 0xFFFF
             
         self.randomizer = pybreezyslam.Randomizer(random_seed)
+
+        # one randomizer per search, a single search draws the same numbers as before
+        self.randomizers = [self.randomizer] + [pybreezyslam.Randomizer(random_seed + k) 
+                                                for k in range(1, search_threads)]
         
         self.sigma_xy_mm = sigma_xy_mm
         self.sigma_theta_degrees = sigma_theta_degrees
         self.max_search_iter = max_search_iter
+        self.max_search_seconds = max_search_seconds
         
     def update(self, scans_mm, pose_change=None, scan_angles_degrees=None, should_update_map=True):
 
@@ -273,12 +301,155 @@ class RMHC_SLAM(SinglePositionSLAM):
             self.sigma_xy_mm,
             self.sigma_theta_degrees,
             self.max_search_iter,
-            self.randomizer)
+            self.randomizers,
+            self.max_search_seconds or 0)
                              
     def _random_normal(self, mu, sigma):
         
         return mu + self.randomizer.rnor() * sigma
 
+# CoarseToFine_SLAM class ----------------------------------------------------------------------------------------------
+
+class CoarseToFine_SLAM(RMHC_SLAM):
+    '''
+    CoarseToFine_SLAM implements the _getNewPosition() method of SinglePositionSLAM using Random-Mutation 
+    Hill-Climbing search on a pyramid of maps: a wide search on the coarsest map, then narrower ones on each finer
+    map, down to the full resolution map.  The coarse maps are kept up to date with the map.
+    '''
+    
+    def __init__(self, laser, map_size_pixels, map_size_meters, 
+                map_quality=_DEFAULT_MAP_QUALITY, hole_width_mm=_DEFAULT_HOLE_WIDTH_MM,
+                random_seed=None, sigma_xy_mm=_DEFAULT_COARSE_SIGMA_XY_MM, 
+                sigma_theta_degrees=_DEFAULT_COARSE_SIGMA_THETA_DEGREES, max_search_iter=_DEFAULT_LEVEL_SEARCH_ITER, 
+                search_threads=1, max_search_seconds=None, pyramid_levels=_DEFAULT_PYRAMID_LEVELS):
+        '''
+        Creates a CoarseToFine_SLAM object suitable for updating with new Lidar and odometry data.
+        Parameters are those of RMHC_SLAM, except:
+        sigma_xy_mm and sigma_theta_degrees specify the standard deviations for the search on the coarsest map,
+           halved at each finer map
+        max_search_iter specifies the maximum number of iterations for the search on each map
+        max_search_seconds is shared evenly between the maps
+        pyramid_levels specifies the number of coarse maps, each of half the size of the previous one
+        '''
+    
+        RMHC_SLAM.__init__(self, laser, map_size_pixels, map_size_meters, map_quality, hole_width_mm,
+            random_seed, sigma_xy_mm, sigma_theta_degrees, max_search_iter, search_threads, max_search_seconds)
+
+        # coarsest map last
+        self.pyramid = []
+        for level in range(pyramid_levels):
+            map_size_pixels //= 2
+            self.pyramid.append(pybreezyslam.Map(map_size_pixels, map_size_meters))
+
+        self._updatePyramid()
+
+    def setmap(self, mapbytes):
+        '''
+        Sets current map pixels to values in bytearray, where bytearray length is square of map size passed
+        to CoarseToFine_SLAM.__init__(), and updates the coarse maps from it.
+        '''
+        RMHC_SLAM.setmap(self, mapbytes)
+
+        self._updatePyramid()
+
+    def _updateMapAndPointcloud(self, dxy_mm, dtheta_degrees, should_update_map):
+
+        RMHC_SLAM._updateMapAndPointcloud(self, dxy_mm, dtheta_degrees, should_update_map)
+
+        if should_update_map:
+            self._updatePyramid()
+
+    def _updatePyramid(self):
+
+        finer = self.map
+        for coarse in self.pyramid:
+            finer.downsample(coarse)
+            finer = coarse
+
+    def _getNewPosition(self, start_position):
+        '''
+        Implements the _getNewPosition() method of SinglePositionSLAM. Uses Random-Mutation Hill-Climbing
+        search on each map, from the coarsest to the full resolution one, each search starting from the position
+        found by the previous one.
+        '''     
+
+        maps = self.pyramid[::-1] + [self.map]
+
+        position = start_position
+        sigma_xy_mm = self.sigma_xy_mm
+        sigma_theta_degrees = self.sigma_theta_degrees
+        
+        for searchmap in maps:
+
+            position = pybreezyslam.rmhcPositionSearch(
+                position, 
+                searchmap, 
+                self.scan_for_distance, 
+                self.laser,
+                sigma_xy_mm,
+                sigma_theta_degrees,
+                self.max_search_iter,
+                self.randomizers,
+                (self.max_search_seconds or 0) / len(maps))
+
+            sigma_xy_mm /= 2
+            sigma_theta_degrees /= 2
+
+        return position
+
+# BranchAndBound_SLAM class --------------------------------------------------------------------------------------------
+
+class BranchAndBound_SLAM(SinglePositionSLAM):
+    '''
+    BranchAndBound_SLAM implements the _getNewPosition() method of SinglePositionSLAM using a correlative scan
+    matcher: every translation of a whole pixel and every rotation of a whole angular step within a window around
+    the starting position is considered, and the best one is found by branch-and-bound over min-pooled grids of
+    the map.  The result is deterministic, and the worst case is bounded by the size of the window.
+    '''
+    
+    def __init__(self, laser, map_size_pixels, map_size_meters, 
+                map_quality=_DEFAULT_MAP_QUALITY, hole_width_mm=_DEFAULT_HOLE_WIDTH_MM,
+                window_xy_mm=_DEFAULT_WINDOW_XY_MM, window_theta_degrees=_DEFAULT_WINDOW_THETA_DEGREES, 
+                angular_step_degrees=None):
+        '''
+        Creates a BranchAndBound_SLAM object suitable for updating with new Lidar and odometry data.
+        laser is a Laser object representing the specifications of your Lidar unit
+        map_size_pixels is the size of the square map in pixels
+        map_size_meters is the size of the square map in meters
+        quality from 0 through 255 determines integration speed of scan into map
+        hole_width_mm determines width of obstacles (walls)
+        window_xy_mm specifies the largest translation searched along X and Y, either way
+        window_theta_degrees specifies the largest rotation searched, either way
+        angular_step_degrees specifies the rotation step; by default it is computed for each scan so that its 
+           farthest point moves by about one pixel
+        '''
+    
+        SinglePositionSLAM.__init__(self, laser, map_size_pixels, map_size_meters, 
+            map_quality, hole_width_mm)
+
+        self.matcher = pybreezyslam.ScanMatcher(window_xy_mm, window_theta_degrees, angular_step_degrees or 0)
+        
+    def update(self, scans_mm, pose_change=None, scan_angles_degrees=None, should_update_map=True):
+
+        if not pose_change:
+        
+            pose_change = (0, 0, 0)
+    
+        CoreSLAM.update(self, scans_mm, pose_change, scan_angles_degrees, should_update_map)   
+    
+    def _getNewPosition(self, start_position):
+        '''
+        Implements the _getNewPosition() method of SinglePositionSLAM. Uses branch-and-bound correlative scan 
+        matching to find the best position within the search window around the starting position.
+        '''     
+        
+        # The search is implemented as a C extension for efficiency
+        return pybreezyslam.bnbPositionSearch(
+            start_position, 
+            self.map, 
+            self.scan_for_distance, 
+            self.matcher)
+
  # Deterministic_SLAM class  ------------------------------------------------------------------------------------        
 
 class Deterministic_SLAM(SinglePositionSLAM):
@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+
+'''
+kernelbench.py - Checks the distanceScanToMap kernels against each other and times them.
+
+Builds a map from simulated scans of a room, then scores a scan at random positions around the true one, the
+way the RMHC search does, with every kernel supported by this CPU. Exits with an error when a kernel deviates from
+the first one by more than the tolerance.
+
+Usage: python kernelbench.py [positions]
+'''
+
+import sys
+import time
+
+import numpy as np
+
+import pybreezyslam
+
+from breezyslam.algorithms import Deterministic_SLAM
+from breezyslam.sensors import Laser
+
+from roomsim import simulated_scan
+
+MAP_SIZE_PIXELS = 600
+MAP_SIZE_METERS = 10
+
+# largest relative difference of a score from the one of the first kernel, 1 %: single precision kernels may round a
+# coordinate on the far side of a pixel border, which moves a score by a few tenths of a percent
+TOLERANCE = 0.01
+
+def main():
+
+    positions = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+
+    laser = Laser(360, 5, 360, 4000, 0, 0)
+
+    slam = Deterministic_SLAM(laser, MAP_SIZE_PIXELS, MAP_SIZE_METERS)
+
+    # a map integrated from a few scans, the pose of the robot known
+    x_mm, y_mm = 2500, 3000
+
+    for k in range(20):
+        x, y, theta = x_mm + 100 * k, y_mm + 50 * k, 5 * k
+        slam.position = pybreezyslam.Position(x, y, theta)
+        slam.update(simulated_scan(laser, x, y, theta), (0, 0, 0))
+
+    x, y, theta = slam.getpos()
+
+    scan = pybreezyslam.Scan(laser, 1)
+    scan.update(scans_mm=simulated_scan(laser, x, y, theta), hole_width_mm=600, velocities=(0, 0),
+                scan_angles_degrees=None)
+
+    random = np.random.RandomState(0)
+    candidates = [pybreezyslam.Position(x + dx, y + dy, theta + dtheta) for dx, dy, dtheta in
+                  zip(random.normal(0, 100, positions), random.normal(0, 100, positions),
+                      random.normal(0, 20, positions))]
+
+    print('%d positions, %s' % (positions, scan))
+
+    reference = None
+    failures = 0
+
+    for kernel in pybreezyslam.distanceKernels():
+
+        pybreezyslam.setDistanceKernel(kernel)
+
+        start = time.perf_counter()
+        distances = np.array([pybreezyslam.distanceScanToMap(slam.map, scan, position) for position in candidates])
+        elapsed = time.perf_counter() - start
+
+        if reference is None:
+            reference = distances
+
+        same = np.mean(distances == reference)
+        deviation = np.max(np.abs(distances - reference) / np.maximum(reference, 1))
+
+        # a deviation that is not a number fails too
+        ok = deviation <= TOLERANCE
+
+        print('%-8s %6.2f us per call | same as %s %6.2f %% | max deviation %.4f %% | %s' %
+              (kernel, elapsed / positions * 1e6, pybreezyslam.distanceKernels()[0], same * 100, deviation * 100,
+               'ok' if ok else 'FAILED'))
+
+        failures += not ok
+
+    if failures:
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -171,6 +171,110 @@ static position_t pypos2cpos(Position * pypos)
 
 // Scan class ------------------------------------------------------------
 
+// Helper for Scan.update(): copies a list, or a one-dimensional buffer of numbers such as a NumPy array, into
+// either an int or a float C array holding at most capacity values.  Returns the number of values, or -1 with
+// an exception raised.
+static Py_ssize_t values_from_sequence(
+        PyObject * py_values,
+        int * ints,
+        float * floats,
+        Py_ssize_t capacity,
+        const char * details)
+{
+    if (PyList_Check(py_values))
+    {
+        Py_ssize_t count = PyList_Size(py_values);
+
+        if (count > capacity)
+        {
+            null_on_raise_argument_exception_with_details("Scan", "update", details);
+            return -1;
+        }
+
+        for (Py_ssize_t k=0; k<count; ++k)
+        {
+            double value = PyFloat_AsDouble(PyList_GetItem(py_values, k));
+
+            if (value == -1.0 && PyErr_Occurred())
+            {
+                return -1;
+            }
+
+            if (ints)
+            {
+                ints[k] = (int)value;
+            }
+            else
+            {
+                floats[k] = (float)value;
+            }
+        }
+
+        return count;
+    }
+
+    Py_buffer view;
+
+    if (PyObject_GetBuffer(py_values, &view, PyBUF_C_CONTIGUOUS | PyBUF_FORMAT) < 0)
+    {
+        PyErr_Clear();
+        null_on_raise_argument_exception_with_details("Scan", "update", details);
+        return -1;
+    }
+
+    // Native byte order only; '@' and '=' prefixes are accepted
+    const char * format = view.format ? view.format : "B";
+    if (*format == '@' || *format == '=')
+    {
+        format++;
+    }
+
+    Py_ssize_t count = view.itemsize ? view.len / view.itemsize : 0;
+
+    if (view.ndim > 1 || format[0] == 0 || format[1] != 0 || !strchr("fdbBhHiIlLqQ", format[0]) ||
+        count > capacity)
+    {
+        PyBuffer_Release(&view);
+        null_on_raise_argument_exception_with_details("Scan", "update", details);
+        return -1;
+    }
+
+    for (Py_ssize_t k=0; k<count; ++k)
+    {
+        const char * item = (const char *)view.buf + k * view.itemsize;
+        double value = 0;
+
+        switch (format[0])
+        {
+            case 'f': value = *(const float *)item; break;
+            case 'd': value = *(const double *)item; break;
+            case 'b': value = *(const signed char *)item; break;
+            case 'B': value = *(const unsigned char *)item; break;
+            case 'h': value = *(const short *)item; break;
+            case 'H': value = *(const unsigned short *)item; break;
+            case 'i': value = *(const int *)item; break;
+            case 'I': value = *(const unsigned int *)item; break;
+            case 'l': value = (double)*(const long *)item; break;
+            case 'L': value = (double)*(const unsigned long *)item; break;
+            case 'q': value = (double)*(const long long *)item; break;
+            case 'Q': value = (double)*(const unsigned long long *)item; break;
+        }
+
+        if (ints)
+        {
+            ints[k] = (int)value;
+        }
+        else
+        {
+            floats[k] = (float)value;
+        }
+    }
+
+    PyBuffer_Release(&view);
+
+    return count;
+}
+
 typedef struct 
 {
     PyObject_HEAD
@@ -284,39 +388,38 @@ Scan_update(Scan *self, PyObject *args, PyObject *kwds)
         return null_on_raise_argument_exception("Scan", "update");
     }
 
-    // Bozo filter on LIDAR argument
-    if (!PyList_Check(py_lidar))
+    // Extract LIDAR values from argument: a list or a buffer of numbers
+    Py_ssize_t scan_size = values_from_sequence(py_lidar, self->lidar_distances_mm, NULL, self->scan.size,
+            "lidar must be a list or a one-dimensional buffer of numbers no longer than the scan size");
+
+    if (scan_size < 0)
     {
-        return null_on_raise_argument_exception_with_details("Scan", "update", 
-            "lidar must be a list");
+        return NULL;
     }
 
     // Scan angles provided
     if (py_scan_angles_degrees != Py_None) 
     {
-        // Bozo filter #1: SCAN_ANGLES_DEGREES  must be a list
-        if (!PyList_Check(py_scan_angles_degrees))
+        // Extract scan angle values from argument
+        Py_ssize_t angles_size = values_from_sequence(py_scan_angles_degrees, NULL, self->lidar_angles_deg,
+                self->scan.size,
+                "scan angles must be a list or a one-dimensional buffer of numbers no longer than the scan size");
+
+        if (angles_size < 0)
         {
-            return null_on_raise_argument_exception_with_details("Scan", "update", 
-                    "scan angles must be a list");
+            return NULL;
         }
 
-        // Bozo filter #2: must have same number of scan angles as scan distances
-        if (PyList_Size(py_lidar) != PyList_Size(py_scan_angles_degrees))
+        // Bozo filter: must have same number of scan angles as scan distances
+        if (angles_size != scan_size)
         {
             return null_on_raise_argument_exception_with_details("Scan", "update", 
                     "number of scan angles must equal number of scan distances");
         }
-
-        // Extract scan angle values from argument
-        for (int k=0; k<PyList_Size(py_scan_angles_degrees); ++k)
-        {
-            self->lidar_angles_deg[k] = (float)PyFloat_AsDouble(PyList_GetItem(py_scan_angles_degrees, k));
-        }
     }
 
-    // No scan angles provided; lidar-list size must match scan size
-    else if (PyList_Size(py_lidar) != self->scan.size)
+    // No scan angles provided; lidar size must match scan size
+    else if (scan_size != self->scan.size)
     {        
         return null_on_raise_argument_exception_with_details("Scan", "update", 
                 "lidar size mismatch");
@@ -344,22 +447,20 @@ Scan_update(Scan *self, PyObject *args, PyObject *kwds)
         }
     }
 
-    // Extract LIDAR values from argument
-    for (int k=0; k<PyList_Size(py_lidar); ++k)
-    {
-        self->lidar_distances_mm[k] = (int)PyFloat_AsDouble(PyList_GetItem(py_lidar, k));
-    }
+    // Update the scan; pure C from here on, so other Python threads can run meanwhile
+    Py_BEGIN_ALLOW_THREADS
 
-    // Update the scan
     scan_update(
             &self->scan, 
             (py_scan_angles_degrees != Py_None) ? self->lidar_angles_deg :NULL,
             self->lidar_distances_mm, 
-            PyList_Size(py_lidar),
+            (int)scan_size,
             hole_width_mm,
             dxy_mm,
             dtheta_degrees);
 
+    Py_END_ALLOW_THREADS
+
     Py_RETURN_NONE;
 
 } // Scan_update
@@ -369,10 +470,12 @@ static PyMethodDef Scan_methods[] =
 {
     {"update", (PyCFunction)Scan_update, METH_VARARGS | METH_KEYWORDS, 
         "Scan.update(scans_mm, hole_width_mm, velocities=None) updates scan.\n"\
-            "scans_mm is a list of integers representing scanned distances in mm.\n"\
+            "scans_mm is a list of integers representing scanned distances in mm,\n"\
+            "or any one-dimensional buffer of numbers, e.g. a NumPy float array.\n"\
             "hole_width_mm is the width of holes (obstacles, walls) in millimeters.\n"\
             "velocities is an optional tuple containing (dxy_mm/dt, dtheta_degrees/dt);\n"\
-            "i.e., robot's (forward, rotational velocity) for improving the quality of the scan."
+            "i.e., robot's (forward, rotational velocity) for improving the quality of the scan.\n"\
+            "scan_angles_degrees is an optional list or buffer of angles, one per scanned distance."
     },
     {NULL}  // Sentinel 
 };
@@ -440,24 +543,34 @@ typedef struct
     
     map_t map;
     
+    // Buffer layout of the map pixels, see Map_getbuffer()
+    Py_ssize_t shape[2];
+    Py_ssize_t strides[2];
+
 } Map;
 
-// Helper for Map.__init__(), Map.set()
-static int bad_mapbytes(PyObject * py_mapbytes, int size_pixels, const char * methodname)
+// Helper for Map.__init__(), Map.get(), Map.set(): gets a contiguous buffer holding one byte per map pixel,
+// e.g. a bytearray or a NumPy uint8 array, writable for Map.get().  Returns 0 with an exception raised on failure.
+static int get_mapbytes(PyObject * py_mapbytes, Py_buffer * view, int size_pixels, int writable,
+        const char * methodname)
 {    
-    if (!PyByteArray_Check(py_mapbytes))
+    if (PyObject_GetBuffer(py_mapbytes, view, writable ? PyBUF_WRITABLE : PyBUF_SIMPLE) < 0)
     {
-        return error_on_raise_argument_exception_with_details("Map", methodname, 
-            "argument is not a byte array");        
+        PyErr_Clear();
+        error_on_raise_argument_exception_with_details("Map", methodname, 
+            writable ? "argument is not a writable contiguous buffer" : "argument is not a contiguous buffer");
+        return 0;
     }
     
-    if (PyByteArray_GET_SIZE(py_mapbytes) != (size_pixels * size_pixels))
+    if (view->len != (Py_ssize_t)size_pixels * size_pixels)
     {        
-        return error_on_raise_argument_exception_with_details("Map", methodname, 
+        PyBuffer_Release(view);
+        error_on_raise_argument_exception_with_details("Map", methodname, 
             "mapbytes are wrong size");
+        return 0;
     }
 
-    return 0;
+    return 1;
 }
 
 static void
@@ -497,9 +610,23 @@ Map_init(Map *self, PyObject *args, PyObject *kwds)
            
     map_init(&self->map, size_pixels, size_meters);
     
-    if (py_bytes && !bad_mapbytes(py_bytes, size_pixels, "__init__"))
+    self->shape[0] = size_pixels;
+    self->shape[1] = size_pixels;
+    self->strides[0] = size_pixels * sizeof(pixel_t);
+    self->strides[1] = sizeof(pixel_t);
+
+    if (py_bytes)
     {    
-        map_set(&self->map, PyByteArray_AsString(py_bytes));
+        Py_buffer view;
+
+        if (!get_mapbytes(py_bytes, &view, size_pixels, 0, "__init__"))
+        {
+            return -1;
+        }
+
+        map_set(&self->map, view.buf);
+
+        PyBuffer_Release(&view);
     }
     
     return 0;
@@ -527,12 +654,20 @@ Map_get(Map * self, PyObject * args, PyObject * kwds)
         return null_on_raise_argument_exception("Map", "get");
     }
     
-    if (bad_mapbytes(py_mapbytes, self->map.size_pixels, "get"))
+    Py_buffer view;
+
+    if (!get_mapbytes(py_mapbytes, &view, self->map.size_pixels, 1, "get"))
     {
-        Py_RETURN_NONE;
+        return NULL;
     }
     
-    map_get(&self->map, PyByteArray_AsString(py_mapbytes));
+    Py_BEGIN_ALLOW_THREADS
+
+    map_get(&self->map, view.buf);
+
+    Py_END_ALLOW_THREADS
+
+    PyBuffer_Release(&view);
     
     Py_RETURN_NONE;
 }
@@ -544,19 +679,93 @@ Map_set(Map * self, PyObject * args, PyObject * kwds)
 
     if (!PyArg_ParseTuple(args, "O", &py_mapbytes))
     {
-        return null_on_raise_argument_exception("Map", "get");
+        return null_on_raise_argument_exception("Map", "set");
     }
     
-    if (bad_mapbytes(py_mapbytes, self->map.size_pixels, "get"))
+    Py_buffer view;
+
+    if (!get_mapbytes(py_mapbytes, &view, self->map.size_pixels, 0, "set"))
     {
-        Py_RETURN_NONE;
+        return NULL;
     }
     
-    map_set(&self->map, PyByteArray_AsString(py_mapbytes));
+    Py_BEGIN_ALLOW_THREADS
+
+    map_set(&self->map, view.buf);
+
+    Py_END_ALLOW_THREADS
+
+    PyBuffer_Release(&view);
     
     Py_RETURN_NONE;
 }
 
+static PyObject *
+Map_downsample(Map * self, PyObject * args, PyObject * kwds)
+{        
+    Map * py_coarse = NULL;
+
+    if (!PyArg_ParseTuple(args, "O", &py_coarse))
+    {
+        return null_on_raise_argument_exception("Map", "downsample");
+    }
+
+    if (error_on_check_argument_type((PyObject *)py_coarse, Py_TYPE(self), 0, 
+            "pybreezyslam.Map", "Map", "downsample"))
+    {
+        return NULL;
+    }
+
+    if (py_coarse->map.size_pixels != self->map.size_pixels / 2)
+    {
+        return null_on_raise_argument_exception_with_details("Map", "downsample", 
+                "coarse map size must be half the map size");
+    }
+    
+    Py_BEGIN_ALLOW_THREADS
+
+    map_downsample(&self->map, &py_coarse->map);
+
+    Py_END_ALLOW_THREADS
+
+    Py_RETURN_NONE;
+}
+
+// Exports the map pixels themselves, read-only: a size_pixels x size_pixels array of 16-bit values whose high
+// byte is what Map.get() returns.  The buffer follows the map as it is updated.
+static int
+Map_getbuffer(Map * self, Py_buffer * view, int flags)
+{
+    if (flags & PyBUF_WRITABLE)
+    {
+        PyErr_SetString(PyExc_BufferError, "Map buffer is read-only");
+        view->obj = NULL;
+        return -1;
+    }
+
+    view->obj = (PyObject *)self;
+    Py_INCREF(self);
+
+    view->buf = self->map.pixels;
+    view->len = self->shape[0] * self->shape[1] * sizeof(pixel_t);
+    view->readonly = 1;
+    view->itemsize = sizeof(pixel_t);
+    view->format = (flags & PyBUF_FORMAT) ? "H" : NULL;
+    view->ndim = (flags & PyBUF_ND) ? 2 : 1;
+    view->shape = (flags & PyBUF_ND) ? self->shape : NULL;
+    view->strides = ((flags & PyBUF_STRIDES) == PyBUF_STRIDES) ? self->strides : NULL;
+    view->suboffsets = NULL;
+    view->internal = NULL;
+
+    return 0;
+}
+
+static PyBufferProcs Map_as_buffer = 
+{
+    (getbufferproc)Map_getbuffer,               // bf_getbuffer
+    0,                                          // bf_releasebuffer
+};
+
 static PyObject *
 Map_update(Map *self, PyObject *args, PyObject *kwds)
 {   
@@ -584,6 +793,8 @@ Map_update(Map *self, PyObject *args, PyObject *kwds)
             
     position_t position = pypos2cpos(py_position);
     
+    Py_BEGIN_ALLOW_THREADS
+
     map_update(
         &self->map, 
         &py_scan->scan, 
@@ -591,6 +802,8 @@ Map_update(Map *self, PyObject *args, PyObject *kwds)
         map_quality, 
         hole_width_mm);
 
+    Py_END_ALLOW_THREADS
+
     Py_RETURN_NONE;
 }
 
@@ -602,17 +815,24 @@ static PyMethodDef Map_methods[] =
     "Hole width determines width of obstacles (walls)."
     },
     {"get", (PyCFunction)Map_get, METH_VARARGS,
-    "Map.get(bytearray) fills byte array with map pixels, where bytearray length is square of size of map."
+    "Map.get(bytearray) fills byte array with map pixels, where bytearray length is square of size of map.\n"\
+    "Any writable contiguous buffer of that many bytes is accepted, e.g. a NumPy uint8 array."
     },
     {"set", (PyCFunction)Map_set, METH_VARARGS,
-    "Map.set(bytearray) fills current map with pixels in bytearray, where bytearray length is square of size of map."
+    "Map.set(bytearray) fills current map with pixels in bytearray, where bytearray length is square of size of map.\n"\
+    "Any contiguous buffer of that many bytes is accepted, e.g. a NumPy uint8 array."
+    },
+    {"downsample", (PyCFunction)Map_downsample, METH_VARARGS,
+    "Map.downsample(Map) fills a map of half the size, covering the same area, with the mean of each 2x2 block\n"\
+    "of pixels of this map, e.g. to keep the coarser levels of a map pyramid up to date."
     },
     {NULL}  // Sentinel 
 };
 
 #define TP_DOC_MAP \
 "A class for maps used in SLAM.\n"\
-"Map.__init__(size_pixels, size_meters, bytes=None)"
+"Map.__init__(size_pixels, size_meters, bytes=None)\n"\
+"memoryview(map) is a read-only view of the 16-bit map pixels, without copy."
 
 
 static PyTypeObject pybreezyslam_MapType = 
@@ -640,7 +860,7 @@ static PyTypeObject pybreezyslam_MapType =
     (reprfunc)Map_str,                          // tp_str
     0,                                          // tp_getattro
     0,                                          // tp_setattro
-    0,                                          // tp_as_buffer
+    &Map_as_buffer,                             // tp_as_buffer
     Py_TPFLAGS_DEFAULT | Py_TPFLAGS_BASETYPE,   // tp_flags
     TP_DOC_MAP,                                 // tp_doc 
     0,                                          // tp_traverse 
@@ -756,6 +976,118 @@ static PyTypeObject pybreezyslam_RandomizerType =
     Randomizer_new,                             // tp_new 
 };
 
+// ScanMatcher class ------------------------------------------------------------
+
+typedef struct 
+{
+    PyObject_HEAD
+    
+    void * matcher;
+    
+} ScanMatcher;
+
+
+static void
+ScanMatcher_dealloc(ScanMatcher* self)
+{            
+    if (self->matcher)
+    {
+        bnb_matcher_free(self->matcher);
+    }
+    
+    Py_TYPE(self)->tp_free((PyObject*)self);
+}
+
+static PyObject *
+ScanMatcher_new(PyTypeObject *type, PyObject *args, PyObject *kwds)
+{    
+    ScanMatcher *self;
+    
+    self = (ScanMatcher *)type->tp_alloc(type, 0);
+    
+    return (PyObject *)self;
+}
+
+static int
+ScanMatcher_init(ScanMatcher *self, PyObject *args, PyObject *kwds)
+{                    
+    double window_xy_mm = 0;
+    double window_theta_degrees = 0;
+    double angular_step_degrees = 0;
+	
+    if (!PyArg_ParseTuple(args, "dd|d", &window_xy_mm, &window_theta_degrees, &angular_step_degrees))
+    {
+        return error_on_raise_argument_exception("ScanMatcher");
+    }
+
+    if (window_xy_mm < 0 || window_theta_degrees < 0)
+    {
+        return error_on_raise_argument_exception("ScanMatcher");
+    }
+    
+    if (self->matcher)
+    {
+        bnb_matcher_free(self->matcher);
+    }
+
+    self->matcher = bnb_matcher_new(window_xy_mm, window_theta_degrees, angular_step_degrees);
+    
+    return 0;
+}
+
+#define TP_DOC_SCANMATCHER \
+"A ScanMatcher object holds the grids of the branch-and-bound scan matcher between searches.\n"\
+"ScanMatcher.__init__(window_xy_mm, window_theta_degrees, angular_step_degrees=0)\n"\
+"The search covers translations up to window_xy_mm and rotations up to window_theta_degrees either way.\n"\
+"A zero angular step is computed for each scan so that its farthest point moves by about one pixel."
+
+static PyTypeObject pybreezyslam_ScanMatcherType = 
+{
+    #if PY_MAJOR_VERSION < 3
+    PyObject_HEAD_INIT(NULL)
+    0,                                          // ob_size
+    #else
+    PyVarObject_HEAD_INIT(NULL, 0)
+    #endif
+    "pybreezyslam.ScanMatcher",                 // tp_name
+    sizeof(ScanMatcher),                        // tp_basicsize
+    0,                                          // tp_itemsize
+    (destructor)ScanMatcher_dealloc,            // tp_dealloc
+    0,                                          // tp_print
+    0,                                          // tp_getattr
+    0,                                          // tp_setattr
+    0,                                          // tp_compare
+    0,                                          // tp_repr
+    0,                                          // tp_as_number
+    0,                                          // tp_as_sequence
+    0,                                          // tp_as_positionping
+    0,                                          // tp_hash 
+    0,                                          // tp_call
+    0,                                          // tp_str
+    0,                                          // tp_getattro
+    0,                                          // tp_setattro
+    0,                                          // tp_as_buffer
+    Py_TPFLAGS_DEFAULT | Py_TPFLAGS_BASETYPE,   // tp_flags
+    TP_DOC_SCANMATCHER,                         // tp_doc 
+    0,                                          // tp_traverse 
+    0,                                          // tp_clear 
+    0,                                          // tp_richcompare 
+    0,                                          // tp_weaklistoffset 
+    0,                                          // tp_iter 
+    0,                                          // tp_iternext 
+    0,                         					// tp_methods 
+    0,                         					// tp_members 
+    0,                                          // tp_getset 
+    0,                                          // tp_base 
+    0,                                          // tp_dict 
+    0,                                          // tp_descr_get 
+    0,                                          // tp_descr_set 
+    0,                                          // tp_dictoffset 
+    (initproc)ScanMatcher_init,                 // tp_init 
+    0,                                          // tp_alloc 
+    ScanMatcher_new,                            // tp_new 
+};
+
 
 // pybreezyslam module ------------------------------------------------------------
 
@@ -788,8 +1120,16 @@ distanceScanToMap(PyObject *self, PyObject *args)
     // Translate position object from Python to C
     position_t c_position = pypos2cpos(py_position);
     
-    // Run C version and return Python integer
-    return PyLong_FromLong(distance_scan_to_map(&py_map->map, &py_scan->scan, c_position));
+    // Run C version without the GIL and return Python integer
+    int distance = 0;
+
+    Py_BEGIN_ALLOW_THREADS
+
+    distance = distance_scan_to_map(&py_map->map, &py_scan->scan, c_position);
+
+    Py_END_ALLOW_THREADS
+
+    return PyLong_FromLong(distance);
 }
 
 // Called internally, so minimal type-checking on arguments
@@ -803,10 +1143,11 @@ rmhcPositionSearch(PyObject *self, PyObject *args)
 	double sigma_xy_mm = 0;
 	double sigma_theta_degrees = 0;
 	int max_search_iter = 0;
-	Randomizer * py_randomizer = NULL;
+	PyObject * py_randomizers = NULL;
+	double time_budget_seconds = 0;
 	
     // Extract Python objects for map, scan, and position
-    if (!PyArg_ParseTuple(args, "OOOOddiO", 
+    if (!PyArg_ParseTuple(args, "OOOOddiO|d", 
         &py_start_pos,
         &py_map,
         &py_scan,
@@ -814,23 +1155,80 @@ rmhcPositionSearch(PyObject *self, PyObject *args)
         &sigma_xy_mm,
         &sigma_theta_degrees,
         &max_search_iter,
-        &py_randomizer))
+        &py_randomizers,
+        &time_budget_seconds))
     {        
         return null_on_raise_argument_exception("breezyslam.algorithms", "rmhcPositionSearch");
     }
     
+    // A single randomizer, or a sequence of them for as many searches in parallel
+    PyObject * py_sequence = PyObject_TypeCheck(py_randomizers, &pybreezyslam_RandomizerType) ? 
+        PyTuple_Pack(1, py_randomizers) :
+        PySequence_Fast(py_randomizers, "randomizer must be a Randomizer or a sequence of Randomizers");
+
+    if (py_sequence == NULL)
+    {
+        return NULL;
+    }
+
+    int nsearches = (int)PySequence_Fast_GET_SIZE(py_sequence);
+
+    if (nsearches == 0)
+    {
+        Py_DECREF(py_sequence);
+        return null_on_raise_argument_exception_with_details("breezyslam.algorithms", "rmhcPositionSearch", 
+                "at least one randomizer is needed");
+    }
+
+    void ** randomizers = (void **)PyMem_Malloc(nsearches * sizeof(void *));
+
+    if (randomizers == NULL)
+    {
+        Py_DECREF(py_sequence);
+        return PyErr_NoMemory();
+    }
+
+    int k = 0;
+    for (k=0; k<nsearches; ++k)
+    {
+        PyObject * py_randomizer = PySequence_Fast_GET_ITEM(py_sequence, k);
+
+        if (error_on_check_argument_type(py_randomizer, &pybreezyslam_RandomizerType, 7,
+                "pybreezyslam.Randomizer", "pybreezyslam", "rmhcPositionSearch"))
+        {
+            PyMem_Free(randomizers);
+            Py_DECREF(py_sequence);
+            return NULL;
+        }
+
+        randomizers[k] = ((Randomizer *)py_randomizer)->randomizer;
+    }
+
     // Convert Python objects to C structures
     position_t start_pos = pypos2cpos(py_start_pos);
 
-	position_t likeliest_position = 
-    rmhc_position_search(
+	position_t likeliest_position;
+
+    // The search only touches C structures, so the GIL is released for its whole run
+    Py_BEGIN_ALLOW_THREADS
+
+    likeliest_position = 
+    rmhc_position_search_parallel(
         start_pos,
         &py_map->map,
         &py_scan->scan,
         sigma_xy_mm,
         sigma_theta_degrees,
         max_search_iter,
-        py_randomizer->randomizer);    
+        randomizers,
+        nsearches,
+        time_budget_seconds);    
+
+    Py_END_ALLOW_THREADS
+
+    // The sequence holds the randomizers until the search is over
+    PyMem_Free(randomizers);
+    Py_DECREF(py_sequence);
     
     
     // Convert C position back to Python object
@@ -846,6 +1244,114 @@ rmhcPositionSearch(PyObject *self, PyObject *args)
     
 }
 
+// Called internally, so minimal type-checking on arguments
+static PyObject *
+bnbPositionSearch(PyObject *self, PyObject *args)
+{   	    
+    Position * py_start_pos = NULL;
+    Map * py_map = NULL;
+    Scan * py_scan = NULL;
+    ScanMatcher * py_matcher = NULL;
+	
+    if (!PyArg_ParseTuple(args, "OOOO", 
+        &py_start_pos,
+        &py_map,
+        &py_scan,
+        &py_matcher))
+    {        
+        return null_on_raise_argument_exception("breezyslam.algorithms", "bnbPositionSearch");
+    }
+
+    if (error_on_check_argument_type((PyObject *)py_matcher, &pybreezyslam_ScanMatcherType, 3,
+            "pybreezyslam.ScanMatcher", "pybreezyslam", "bnbPositionSearch"))
+    {
+        return NULL;
+    }
+    
+    position_t start_pos = pypos2cpos(py_start_pos);
+
+    position_t likeliest_position;
+
+    // The search only touches C structures, so the GIL is released for its whole run
+    Py_BEGIN_ALLOW_THREADS
+
+    likeliest_position = bnb_position_search(start_pos, &py_map->map, &py_scan->scan, py_matcher->matcher);
+
+    Py_END_ALLOW_THREADS
+
+    // Convert C position back to Python object
+    PyObject * argList = Py_BuildValue("ddd", 
+        likeliest_position.x_mm, 
+        likeliest_position.y_mm, 
+        likeliest_position.theta_degrees); 
+    PyObject * py_likeliest_position = 
+    PyObject_CallObject((PyObject *) &pybreezyslam_PositionType, argList);
+    Py_DECREF(argList);	
+    
+    return py_likeliest_position;
+}
+
+static PyObject *
+distanceKernels(PyObject *self, PyObject *args)
+{
+    PyObject * py_names = PyList_New(0);
+
+    if (py_names == NULL)
+    {
+        return NULL;
+    }
+
+    // Only the kernels supported by this CPU are listed
+    int k = 0;
+    for (k=0; k<distance_kernel_count(); ++k)
+    {
+        const char * name = distance_kernel_name(k);
+
+        if (name == NULL)
+        {
+            continue;
+        }
+
+        PyObject * py_name = PyUnicode_FromString(name);
+
+        if (py_name == NULL || PyList_Append(py_names, py_name))
+        {
+            Py_XDECREF(py_name);
+            Py_DECREF(py_names);
+            return NULL;
+        }
+
+        Py_DECREF(py_name);
+    }
+
+    return py_names;
+}
+
+static PyObject *
+getDistanceKernel(PyObject *self, PyObject *args)
+{
+    return PyUnicode_FromString(distance_kernel_selected());
+}
+
+static PyObject *
+setDistanceKernel(PyObject *self, PyObject *args)
+{
+    const char * name = NULL;
+
+    if (!PyArg_ParseTuple(args, "s", &name))
+    {
+        return null_on_raise_argument_exception("breezyslam", "setDistanceKernel");
+    }
+
+    if (distance_kernel_select(name))
+    {
+        PyErr_Format(PyExc_ValueError, "pybreezyslam.setDistanceKernel: kernel %s not available", name);
+        return NULL;
+    }
+
+    Py_RETURN_NONE;
+}
+
 
 static PyMethodDef module_methods[] = 
 {
@@ -858,9 +1364,26 @@ static PyMethodDef module_methods[] =
     "position is a breezyslam.components.Position object\n"\
     },
     {"rmhcPositionSearch", rmhcPositionSearch, METH_VARARGS,
-        "rmhcPositionSearch(startpos, map, scan, laser, sigma_xy_mm, max_iter, randomizer)\n"
+        "rmhcPositionSearch(startpos, map, scan, laser, sigma_xy_mm, max_iter, randomizer[, time_budget_seconds])\n"
+    "Internal use only. A sequence of randomizers runs one search per randomizer in parallel threads."
+    },
+    {"bnbPositionSearch", bnbPositionSearch, METH_VARARGS,
+        "bnbPositionSearch(startpos, map, scan, matcher)\n"
     "Internal use only."
     },
+    {"distanceKernels", distanceKernels, METH_NOARGS,
+        "distanceKernels()\n"
+    "Returns the names of the distanceScanToMap kernels supported by this CPU, fastest last."
+    },
+    {"getDistanceKernel", getDistanceKernel, METH_NOARGS,
+        "getDistanceKernel()\n"
+    "Returns the name of the distanceScanToMap kernel in use, by default the fastest one supported."
+    },
+    {"setDistanceKernel", setDistanceKernel, METH_VARARGS,
+        "setDistanceKernel(name)\n"
+    "Selects the distanceScanToMap kernel used from now on, by all maps and scans.\n"\
+    "name is one of distanceKernels()."
+    },
     {NULL, NULL, 0, NULL}        /* Sentinel */
 };
 
@@ -870,6 +1393,7 @@ static void add_classes(PyObject * module)
     add_class(module, &pybreezyslam_MapType, "Map");
     add_class(module, &pybreezyslam_PositionType, "Position");
     add_class(module, &pybreezyslam_RandomizerType, "Randomizer");
+    add_class(module, &pybreezyslam_ScanMatcherType, "ScanMatcher");
 }
 
 static int types_are_ready(void)
@@ -878,7 +1402,8 @@ return
     type_is_ready(&pybreezyslam_ScanType) &&
     type_is_ready(&pybreezyslam_MapType) &&
     type_is_ready(&pybreezyslam_PositionType) &&
-    type_is_ready(&pybreezyslam_RandomizerType);
+    type_is_ready(&pybreezyslam_RandomizerType) &&
+    type_is_ready(&pybreezyslam_ScanMatcherType);
 }
 
 #if PY_MAJOR_VERSION < 3
@@ -898,6 +1423,9 @@ initpybreezyslam(void)
     }
 
     add_classes(module);    
+
+    // The kernel is picked by CPU feature detection at import
+    distance_kernel_select(NULL);
 }
 
 #else
@@ -932,6 +1460,9 @@ PyInit_pybreezyslam(void)
     
     add_classes(module);
     
+    // The kernel is picked by CPU feature detection at import
+    distance_kernel_select(NULL);
+
     return module;
 }
 
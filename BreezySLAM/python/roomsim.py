@@ -0,0 +1,57 @@
+'''
+roomsim.py - Simulated laser scans of a room made of boxes, for the benchmarks and checks of this directory.
+
+A room is a box seen from the inside, its furniture boxes seen from the outside, all as (xmin, ymin, xmax, ymax) in
+millimeters.
+'''
+
+import numpy as np
+
+# room walls and a pillar
+ROOM   = (1000, 2000, 8000, 7000)
+PILLAR = (4000, 4000, 4600, 4400)
+
+# standard deviation of the range noise, in millimeters
+NOISE_MM = 10
+
+def box_distances(box, x, y, angles, inside):
+    '''
+    Distances from (x, y) to a box along each angle, infinite where the ray misses it.
+    '''
+    dx, dy = np.cos(angles), np.sin(angles)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        tx = np.stack(((box[0] - x) / dx, (box[2] - x) / dx))
+        ty = np.stack(((box[1] - y) / dy, (box[3] - y) / dy))
+
+    if inside:
+        # leaving the room through the first wall crossed
+        tx[tx <= 0] = np.inf
+        ty[ty <= 0] = np.inf
+        return np.minimum(tx.min(axis=0), ty.min(axis=0))
+
+    near = np.maximum(tx.min(axis=0), ty.min(axis=0))
+    far = np.minimum(tx.max(axis=0), ty.max(axis=0))
+
+    return np.where((near <= far) & (near > 0), near, np.inf)
+
+def simulated_scan(laser, x, y, theta_degrees, room=ROOM, boxes=(PILLAR,), random=None):
+    '''
+    Scan of the room from (x, y) as a list of distances in millimeters, 0 where nothing is detected. The rays span
+    the detection angle centered on theta, the way Laser spreads them. With a numpy RandomState, the ranges get a
+    gaussian noise of NOISE_MM.
+    '''
+    n = laser.scan_size
+    angles = np.radians(theta_degrees - laser.detection_angle_degrees / 2 +
+                        np.arange(n) * laser.detection_angle_degrees / (n - 1))
+
+    distances = box_distances(room, x, y, angles, True)
+    for box in boxes:
+        distances = np.minimum(distances, box_distances(box, x, y, angles, False))
+
+    if random is not None:
+        distances = distances + random.normal(0, NOISE_MM, n)
+
+    distances[distances > laser.distance_no_detection_mm] = 0
+
+    return distances.astype(int).tolist()
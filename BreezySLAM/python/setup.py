@@ -19,12 +19,14 @@ You should have received a copy of the GNU Lesser General Public License
 along with this code.  If not, see <http://www.gnu.org/licenses/>.
 '''
 
-# Support streaming SIMD extensions
+# Support streaming SIMD extensions: every kernel for the architecture is built, and the fastest one the CPU
+# supports is picked at import
 
-from platform import machine
+from platform import machine, system
 
 OPT_FLAGS  = []
 SIMD_FLAGS = []
+KERNELS    = ['sisd']
 
 arch = machine()
 
@@ -32,28 +34,35 @@ print(arch)
 
 if  arch in ['i686', 'x86_64']:
     SIMD_FLAGS = ['-msse3']
-    arch = 'i686'
+    KERNELS += ['i686', 'avx2']
 
 elif arch == 'armv7l':
     OPT_FLAGS = ['-O3']
     SIMD_FLAGS = ['-mfpu=neon']
+    KERNELS += ['armv7l']
 
-else:
-    arch = 'sisd'
+elif arch in ['aarch64', 'arm64']:
+    OPT_FLAGS = ['-O3']
+    KERNELS += ['aarch64']
+
+# Parallel RMHC searches run on POSIX threads
+THREAD_FLAGS = [] if system() == 'Windows' else ['-pthread']
 
 SOURCES = [
     'pybreezyslam.c', 
     'pyextension_utils.c', 
     '../c/coreslam.c', 
-    '../c/coreslam_' + arch + '.c',
+    '../c/coreslam_dispatch.c',
     '../c/random.c',
-    '../c/ziggurat.c']
+    '../c/ziggurat.c'] + ['../c/coreslam_' + kernel + '.c' for kernel in KERNELS]
 
 from distutils.core import setup, Extension
 
 module = Extension('pybreezyslam', 
     sources = SOURCES, 
-    extra_compile_args = ['-std=gnu99'] + SIMD_FLAGS + OPT_FLAGS
+    define_macros = [('CORESLAM_RUNTIME_DISPATCH', None)],
+    extra_compile_args = ['-std=gnu99'] + SIMD_FLAGS + OPT_FLAGS + THREAD_FLAGS,
+    extra_link_args = THREAD_FLAGS
     )
 
 
@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+
+'''
+slambench.py - Compares the position searches of RMHC_SLAM, CoarseToFine_SLAM and BranchAndBound_SLAM.
+
+Simulates a log of scans along a loop in a furnished room, with range noise and without odometry, once with
+gentle turns and once with sharp ones, then runs each algorithm on it and reports the time per scan and the error
+of the position found against the true one.
+
+Usage: python slambench.py [scans]
+'''
+
+import sys
+import time
+
+import numpy as np
+
+from breezyslam.algorithms import RMHC_SLAM, CoarseToFine_SLAM, BranchAndBound_SLAM
+from breezyslam.sensors import Laser
+
+from roomsim import simulated_scan
+
+MAP_SIZE_PIXELS = 600
+MAP_SIZE_METERS = 10
+
+# room walls and furniture, as (xmin, ymin, xmax, ymax) in millimeters
+ROOM  = (0, 0, 6000, 4000)
+BOXES = [(1500, 1000, 1900, 1300), (4000, 2500, 4300, 3200), (2500, 3000, 2700, 3200), (4800, 600, 5000, 1400)]
+
+SEEDS = (1, 2, 3)
+
+def trajectory(scans, sharp_turns):
+    '''
+    Poses of a loop around the room, 25 mm apart; with sharp turns, five scans in 25 turn by 15 degrees each.
+    '''
+    poses = []
+    x, y, theta = 3000., 2000., 0.
+
+    for k in range(scans):
+        poses.append((x, y, theta))
+        theta += 15 if sharp_turns and k % 25 >= 20 else 2
+        x = min(max(x + 25 * np.cos(np.radians(theta)), 700), 5300)
+        y = min(max(y + 25 * np.sin(np.radians(theta)), 700), 3300)
+
+    return poses
+
+def run(slam, laser, poses, random):
+    '''
+    Returns the seconds per scan, then the position errors in millimeters and degrees at every scan.
+    '''
+    x0, y0, _ = poses[0]
+
+    # SLAM starts at the center of the map
+    offset = MAP_SIZE_METERS * 500
+
+    elapsed = 0
+    xy_errors, theta_errors = [], []
+
+    for x, y, theta in poses:
+
+        scan = simulated_scan(laser, x, y, theta, ROOM, BOXES, random)
+
+        start = time.perf_counter()
+        slam.update(scan)
+        elapsed += time.perf_counter() - start
+
+        slam_x, slam_y, slam_theta = slam.getpos()
+        xy_errors.append(np.hypot(slam_x - offset - (x - x0), slam_y - offset - (y - y0)))
+        theta_errors.append(abs((slam_theta - theta + 180) % 360 - 180))
+
+    return elapsed / len(poses), np.array(xy_errors), np.array(theta_errors)
+
+def main():
+
+    scans = int(sys.argv[1]) if len(sys.argv) > 1 else 150
+
+    laser = Laser(360, 5, 360, 4000, 0, 0)
+
+    algorithms = [
+        ('RMHC_SLAM',           lambda seed: RMHC_SLAM(laser, MAP_SIZE_PIXELS, MAP_SIZE_METERS, random_seed=seed)),
+        ('CoarseToFine_SLAM',   lambda seed: CoarseToFine_SLAM(laser, MAP_SIZE_PIXELS, MAP_SIZE_METERS,
+                                                               random_seed=seed)),
+        ('BranchAndBound_SLAM', lambda seed: BranchAndBound_SLAM(laser, MAP_SIZE_PIXELS, MAP_SIZE_METERS)),
+    ]
+
+    for sharp_turns in (False, True):
+
+        poses = trajectory(scans, sharp_turns)
+
+        print('%d scans, %s turns, mean over seeds %s' % (scans, 'sharp' if sharp_turns else 'gentle', SEEDS))
+
+        for name, create in algorithms:
+
+            results = [run(create(seed), laser, poses, np.random.RandomState(seed)) for seed in SEEDS]
+
+            per_scan = np.mean([result[0] for result in results])
+            xy_errors = np.concatenate([result[1] for result in results])
+            theta_errors = np.concatenate([result[2] for result in results])
+
+            print('  %-20s %6.2f ms per scan | xy error mean %5.0f mm max %5.0f mm | theta error mean %5.2f deg' %
+                  (name, per_scan * 1000, xy_errors.mean(), xy_errors.max(), theta_errors.mean()))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,166 @@
+#!/usr/bin/env python
+
+'''
+threadbench.py - Measures the camera detection stage of the viewer while RMHC_SLAM runs in another thread.
+
+The main thread runs the detection stream the way the viewer does, 30 frames per second: each 320x240 grayscale
+JPEG frame is decoded by CameraIngest and its QR code tracked by QRCodeTracker. A second thread updates RMHC_SLAM
+with simulated scans as fast as it can, like a viewer catching up on a backlog of lidar scans. Whether pybreezyslam
+releases the GIL during its C work decides how long each frame waits for it.
+
+The frames are crops of src/image.jpg panning slowly, with a QR code pasted on them moving across the frame and
+back, encoded like the turtle does (quality 95).
+
+The pybreezyslam measured is the build in the directory given, searched before any other. To compare the GIL held
+and released, build the commits before and after pybreezyslam released it, e387183 and 5c51c20, each in its own
+worktree, then run this script from the current tree against both:
+
+    git worktree add /tmp/gil_held e387183
+    git worktree add /tmp/gil_released 5c51c20
+    (cd /tmp/gil_held/BreezySLAM/python && python setup.py build_ext --inplace)
+    (cd /tmp/gil_released/BreezySLAM/python && python setup.py build_ext --inplace)
+
+    python threadbench.py /tmp/gil_held/BreezySLAM/python
+    python threadbench.py /tmp/gil_released/BreezySLAM/python
+
+Usage: python threadbench.py BUILD [seconds]
+'''
+
+import os
+import sys
+import time
+import threading
+
+import numpy as np
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..')
+
+if len(sys.argv) < 2:
+    print('Usage: python threadbench.py BUILD [seconds]')
+    sys.exit(1)
+
+# the build measured first, then the viewer modules of this tree
+sys.path[:0] = [os.path.abspath(sys.argv[1]), ROOT]
+
+import cv2
+
+from breezyslam.algorithms import RMHC_SLAM
+from breezyslam.sensors import Laser
+
+from ei.camera_ingest import CameraIngest
+from ei.qr_tracker import QRCodeTracker
+
+from roomsim import simulated_scan
+
+MAP_SIZE_PIXELS = 600
+MAP_SIZE_METERS = 10
+
+# detection stream of the turtle
+FRAME_SIZE = (320, 240)
+FRAME_RATE = 30
+FRAME_COUNT = 150
+CODE_SIZE = 96
+
+def simulated_scans(laser, count):
+    '''
+    Scans along a slow turn through the room, as lists of distances in millimeters.
+    '''
+    return [simulated_scan(laser, 2500 + 10 * k, 3000 + 5 * k, k) for k in range(count)]
+
+def camera_frames(count):
+    '''
+    JPEG payloads of the detection stream.
+    '''
+    picture = cv2.cvtColor(cv2.imread(os.path.join(ROOT, 'src', 'image.jpg')), cv2.COLOR_BGR2GRAY)
+    code = cv2.QRCodeEncoder.create().encode('waypoint')
+    code = cv2.resize(code, (CODE_SIZE, CODE_SIZE), interpolation=cv2.INTER_NEAREST)
+
+    width, height = FRAME_SIZE
+    payloads = []
+
+    for k in range(count):
+        y = k * (picture.shape[0] - 4 * height) // count
+        frame = cv2.resize(picture[y:y + 4 * height, :4 * width], FRAME_SIZE, interpolation=cv2.INTER_AREA)
+
+        x = int((width - CODE_SIZE) * (0.5 - 0.4 * np.cos(2 * np.pi * k / count)))
+        top = (height - CODE_SIZE) // 2
+        frame[top:top + CODE_SIZE, x:x + CODE_SIZE] = code
+
+        _, jpeg = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 95])
+        payloads.append(jpeg.tobytes())
+
+    return payloads
+
+def run_slam(laser, scans, stop, updates):
+
+    slam = RMHC_SLAM(laser, MAP_SIZE_PIXELS, MAP_SIZE_METERS, random_seed=1)
+    angles = list(range(laser.scan_size))
+
+    while not stop.is_set():
+        for scan in scans:
+            if stop.is_set():
+                break
+
+            slam.update(scan, scan_angles_degrees=angles)
+            updates.append(time.perf_counter())
+
+def camera_loop(payloads, seconds):
+    '''
+    Returns the time spent on each frame, in seconds, and the number of frames where the code was found.
+    '''
+    ingest = CameraIngest(color=False)
+    tracker = QRCodeTracker()
+    tracker.optical_flow = True
+
+    period = 1.0 / FRAME_RATE
+    stages = []
+    found = 0
+
+    start = time.perf_counter()
+    deadline = start
+
+    while deadline - start < seconds:
+        begin = time.perf_counter()
+        points = tracker.detect(ingest.decode(payloads[len(stages) % len(payloads)]))
+        stages.append(time.perf_counter() - begin)
+
+        found += points is not None
+
+        deadline += period
+        time.sleep(max(deadline - time.perf_counter(), 0))
+
+    return np.array(stages), found
+
+def report(name, stages, found, updates=None):
+
+    print('%-12s %4d frames, code found in %5.1f %% | decode + detect median %5.2f ms p99 %6.2f ms max %6.2f ms, '
+          '%3d over %.0f ms%s' %
+          (name, len(stages), found * 100. / len(stages), np.median(stages) * 1000, np.percentile(stages, 99) * 1000,
+           np.max(stages) * 1000, np.sum(stages > 1. / FRAME_RATE), 1000. / FRAME_RATE,
+           '' if updates is None else ' | %d SLAM updates' % updates))
+
+def main():
+
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 10
+
+    laser = Laser(360, 5, 360, 4000, 0, 0)
+    scans = simulated_scans(laser, 100)
+    payloads = camera_frames(FRAME_COUNT)
+
+    print('pybreezyslam from %s' % os.path.dirname(sys.modules['pybreezyslam'].__file__))
+
+    report('camera only', *camera_loop(payloads, seconds))
+
+    stop = threading.Event()
+    updates = []
+    slam = threading.Thread(target=run_slam, args=(laser, scans, stop, updates))
+    slam.start()
+
+    stages, found = camera_loop(payloads, seconds)
+
+    stop.set()
+    slam.join()
+
+    report('with SLAM', stages, found, len(updates))
+
+main()
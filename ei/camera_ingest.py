@@ -0,0 +1,53 @@
+import cv2
+import numpy as np
+
+IMREAD_FLAGS = {
+    1: cv2.IMREAD_COLOR,
+    2: cv2.IMREAD_REDUCED_COLOR_2,
+    4: cv2.IMREAD_REDUCED_COLOR_4,
+    8: cv2.IMREAD_REDUCED_COLOR_8,
+}
+
+IMREAD_GRAYSCALE_FLAGS = {
+    1: cv2.IMREAD_GRAYSCALE,
+    2: cv2.IMREAD_REDUCED_GRAYSCALE_2,
+    4: cv2.IMREAD_REDUCED_GRAYSCALE_4,
+    8: cv2.IMREAD_REDUCED_GRAYSCALE_8,
+}
+
+
+class CameraIngest:
+    def __init__(self, color=True, max_size=None):
+        # the JPEG decoder can scale by 1/2, 1/4 or 1/8 while decoding, far cheaper than a resize afterwards. With a
+        # max_size (width, height), frames are decoded at the strongest reduction that still covers it, chosen from
+        # the size of the previous frame of the stream
+        self.max_size = max_size
+        self.flags = IMREAD_FLAGS if color else IMREAD_GRAYSCALE_FLAGS
+        self.reduction = 1
+
+    def select_reduction(self, height, width):
+        # full size of the frame just decoded, rounded up to a multiple of the reduction
+        height *= self.reduction
+        width *= self.reduction
+
+        max_width, max_height = self.max_size
+
+        self.reduction = max(reduction for reduction in self.flags
+                             if reduction == 1 or (width // reduction >= max_width and
+                                                   height // reduction >= max_height))
+
+    def decode(self, payload):
+        # the payload buffer is decoded in place, without copying it into a new bytes object
+        jpeg = np.frombuffer(payload, dtype=np.uint8)
+
+        image = cv2.imdecode(jpeg, self.flags[self.reduction])
+
+        if image is None:
+            return None
+
+        if self.max_size is not None:
+            self.select_reduction(*image.shape[:2])
+
+        # the image is kept as decoded, (height, width): consumers that want the frame rotated counterclockwise then
+        # flipped around the x axis, i.e. transposed, take a transposed view or swap the coordinates
+        return image
@@ -0,0 +1,67 @@
+import time
+
+
+class CommandPublisher:
+    def __init__(self, publisher, encode, threshold=0.5, keepalive_period=1.0, max_rate=20.0):
+        self.publisher = publisher
+        self.encode = encode
+
+        # a command is sent again when one of its values moved by more than the threshold, or at the keepalive period
+        self.threshold = threshold
+        self.keepalive_period = keepalive_period
+        self.min_period = 1.0 / max_rate
+
+        self.command = None
+        self.sent_command = None
+
+        # the current command has not been published yet
+        self.pending = False
+        self.last_sent = float('-inf')
+
+        # suppressed counts the commands replaced before they were ever published, the changes the rate limit only
+        # defers are sent later by tick and are not counted
+        self.sent = 0
+        self.suppressed = 0
+
+    def changed(self):
+        if self.sent_command is None:
+            return True
+
+        for value, sent_value in zip(self.command, self.sent_command):
+            # stopping is never held back by the threshold
+            if abs(value - sent_value) > self.threshold or (value == 0.0) != (sent_value == 0.0):
+                return True
+
+        return False
+
+    def set(self, command):
+        if self.pending:
+            self.suppressed += 1
+
+        self.command = tuple(command)
+        self.pending = True
+
+        self.tick()
+
+    def tick(self):
+        # called every frame, sends the changes held back by the rate limit and the keepalives
+        if self.command is None:
+            return False
+
+        now = time.monotonic()
+        elapsed = now - self.last_sent
+
+        if elapsed < self.min_period:
+            return False
+
+        if elapsed < self.keepalive_period and not self.changed():
+            return False
+
+        self.publisher.put(self.encode(self.command))
+
+        self.sent_command = self.command
+        self.pending = False
+        self.last_sent = now
+        self.sent += 1
+
+        return True
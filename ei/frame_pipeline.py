@@ -0,0 +1,66 @@
+import threading
+import traceback
+
+from concurrent.futures import ThreadPoolExecutor
+
+
+class FramePipeline:
+    def __init__(self, max_workers=2):
+        # OpenCV releases the GIL, so threads are enough to take the work off the zenoh callbacks
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="frame_pipeline")
+
+        self.lock = threading.Lock()
+
+        # one pending frame per topic: a newer frame replaces the one still waiting
+        self.slots = {}
+        self.running = set()
+
+        self.processed = {}
+        self.dropped = {}
+
+    def submit(self, topic, handler, frame):
+        with self.lock:
+            self.processed.setdefault(topic, 0)
+            self.dropped.setdefault(topic, 0)
+
+            if topic in self.slots:
+                self.dropped[topic] += 1
+
+            self.slots[topic] = (handler, frame)
+
+            # frames of a topic are processed in order by a single worker at a time
+            if topic in self.running:
+                return
+
+            self.running.add(topic)
+
+        self.executor.submit(self.drain, topic)
+
+    def drain(self, topic):
+        while True:
+            with self.lock:
+                item = self.slots.pop(topic, None)
+
+                if item is None:
+                    self.running.discard(topic)
+                    return
+
+            handler, frame = item
+
+            try:
+                handler(frame)
+            except Exception:
+                traceback.print_exc()
+
+            with self.lock:
+                self.processed[topic] += 1
+
+    def stats(self, topic):
+        with self.lock:
+            return self.processed.get(topic, 0), self.dropped.get(topic, 0)
+
+    def quit(self):
+        with self.lock:
+            self.slots.clear()
+
+        self.executor.shutdown(wait=False)
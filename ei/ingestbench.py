@@ -0,0 +1,92 @@
+# Times the display stream frames from the JPEG payload to the camera panel surface: the original imdecode + rotate
+# + flip path, handing the transposed copy to the panel, against CameraIngest at full scale and with the reduced
+# decode picked for the 400x300 panel, handing a transposed view of the decoded image to the panel.
+#
+# The corpus is made of crops of src/image.jpg moving across the picture, encoded like the turtle does (quality 95)
+# at the default display size and at twice that size.
+#
+# Usage: python -m ei.ingestbench [frames]
+
+import sys
+import time
+
+import cv2
+import numpy as np
+
+from ei.camera_ingest import CameraIngest
+from gfs.image import StreamImage
+
+PANEL_SIZE = (400, 300)
+
+
+def corpus(picture, width, height, frames):
+    payloads = []
+
+    for k in range(frames):
+        x = k * (picture.shape[1] - 2 * width) // frames
+        crop = cv2.resize(picture[:, x:x + 2 * width], (width, height), interpolation=cv2.INTER_AREA)
+
+        _, jpeg = cv2.imencode('.jpg', crop, [cv2.IMWRITE_JPEG_QUALITY, 95])
+        payloads.append(jpeg.tobytes())
+
+    return payloads
+
+
+def decode_original(payload):
+    image = np.frombuffer(bytes(payload), dtype=np.uint8)
+    image = cv2.imdecode(image, 1)
+    image = cv2.rotate(image, cv2.ROTATE_90_COUNTERCLOCKWISE)
+
+    return cv2.flip(image, 0)
+
+
+def displayed(decode, transposed):
+    panel = StreamImage(*PANEL_SIZE)
+
+    def display(payload):
+        image = decode(payload)
+        panel.update(image.transpose(1, 0, 2) if transposed else image)
+        panel.refresh()
+
+        return panel.array
+
+    return display
+
+
+def timed(display, payloads, passes=5):
+    # the first pass allocates the buffers and picks the reduction, the best of the others is kept
+    for payload in payloads:
+        image = display(payload)
+
+    best = float('inf')
+
+    for _ in range(passes):
+        start = time.perf_counter()
+
+        for payload in payloads:
+            image = display(payload)
+
+        best = min(best, time.perf_counter() - start)
+
+    return best / len(payloads), image.shape
+
+
+def main():
+    frames = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+
+    picture = cv2.imread('src/image.jpg')
+
+    for width, height in (PANEL_SIZE, (2 * PANEL_SIZE[0], 2 * PANEL_SIZE[1])):
+        payloads = corpus(picture, width, height, frames)
+
+        print('%d frames of %dx%d' % (frames, width, height))
+
+        for name, display in (('original', displayed(decode_original, False)),
+                              ('ingest', displayed(CameraIngest().decode, True)),
+                              ('ingest reduced', displayed(CameraIngest(max_size=PANEL_SIZE).decode, True))):
+            elapsed, shape = timed(display, payloads)
+
+            print('  %-15s %5.2f ms per frame, %dx%d' % (name, elapsed * 1000, shape[0], shape[1]))
+
+
+main()
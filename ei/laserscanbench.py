@@ -0,0 +1,82 @@
+# Checks decode_laser_scan against LaserScan.deserialize of pycdr2 and times both.
+#
+# Frames are serialized by pycdr2 in little and big endian, with an empty frame_id and frame_ids of odd and even
+# lengths, which move the alignment of the fields that follow, and with 0, 7 and 360 samples. Every field decoded
+# must be equal.
+#
+# Usage: python -m ei.laserscanbench [decodes]
+
+import sys
+import time
+
+import numpy as np
+
+from pycdr2 import Endianness
+
+from ei.main_view import Time, Header, LaserScan, decode_laser_scan
+
+FRAME_IDS = ('', 'a', 'ab', 'laser', 'base_scan')
+SAMPLES = (0, 7, 360)
+
+
+def laser_scan(frame_id, samples, random):
+    # values exactly representable on 32 bits, so that both decoders must return the very same floats
+    ranges = random.uniform(0.12, 3.5, samples).astype(np.float32).tolist()
+    intensities = random.uniform(0, 100, samples).astype(np.float32).tolist()
+
+    return LaserScan(Header(Time(1700000000, 123456789), frame_id), 0.0, 6.2657318, 0.017453292, 0.0005,
+                     0.2, 0.12, 3.5, ranges, intensities)
+
+
+def same(decoded, reference):
+    for name in ('angle_min', 'angle_max', 'angle_increment', 'time_increment', 'scan_time', 'range_min',
+                 'range_max'):
+        if getattr(decoded, name) != getattr(reference, name):
+            return False
+
+    return (decoded.header == reference.header and
+            np.array_equal(decoded.ranges, np.array(reference.ranges, dtype=np.float32)) and
+            np.array_equal(decoded.intensities, np.array(reference.intensities, dtype=np.float32)))
+
+
+def timed(decode, payload, decodes):
+    start = time.perf_counter()
+
+    for _ in range(decodes):
+        decode(payload)
+
+    return (time.perf_counter() - start) / decodes
+
+
+def main():
+    decodes = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+
+    random = np.random.RandomState(0)
+    failures = 0
+
+    for endianness in Endianness:
+        for frame_id in FRAME_IDS:
+            for samples in SAMPLES:
+                payload = laser_scan(frame_id, samples, random).serialize(endianness=endianness)
+
+                if not same(decode_laser_scan(payload), LaserScan.deserialize(payload)):
+                    print('%s endian, frame_id %r, %d samples: decoded scans differ' %
+                          (endianness.name, frame_id, samples))
+                    failures += 1
+
+    print('%d frames checked, %d differ' % (len(Endianness) * len(FRAME_IDS) * len(SAMPLES), failures))
+
+    for endianness in Endianness:
+        payload = laser_scan('laser', 360, random).serialize(endianness=endianness)
+
+        deserialize = timed(LaserScan.deserialize, payload, decodes)
+        decode = timed(decode_laser_scan, payload, decodes)
+
+        print('%-6s endian, 360 samples: deserialize %7.1f us, decode_laser_scan %5.1f us, %.0fx' %
+              (endianness.name, deserialize * 1e6, decode * 1e6, deserialize / decode))
+
+    if failures:
+        sys.exit(1)
+
+
+main()
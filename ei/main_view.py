@@ -1,4 +1,6 @@
 import cv2
+import struct
+import threading
 import numpy as np
 import pygame.image
 
@@ -8,9 +10,18 @@ from gfs.gui.interface import Interface
 from gfs.gui.used import Used
 from gfs.fonts import MOTO_MANGUCODE_10
 from gfs.gui.button import *
+from gfs.image import StreamImage
+
+from ei.camera_ingest import CameraIngest
+from ei.command_publisher import CommandPublisher
+from ei.frame_pipeline import FramePipeline
+from ei.pose_estimator import QRPoseEstimator
+from ei.qr_tracker import QRCodeTracker
+from ei.scan_panel import ScanPanel
+from ei.slam_worker import SlamWorker
 
 from pycdr2 import IdlStruct
-from pycdr2.types import uint32, float32
+from pycdr2.types import int32, uint32, float32, float64, array
 from typing import List
 
 from breezyslam.algorithms import RMHC_SLAM
@@ -45,6 +56,69 @@ class LaserScan(IdlStruct, typename="LaserScan"):
     intensities: List[float32]
 
 
+def decode_laser_scan(payload):
+    # same layout as LaserScan.deserialize, but ranges and intensities are read-only float32 arrays over the payload
+    # instead of lists of Python floats
+    order = '<' if payload[1] == 1 else '>'
+
+    # the encapsulation header is followed by the stamp and the frame_id length, NUL included
+    sec, nsec, length = struct.unpack_from(order + '3I', payload, 4)
+    frame_id = payload[16:16 + length - 1].decode()
+
+    # alignment is relative to the end of the encapsulation header
+    offset = 16 + length
+    offset += -(offset - 4) % 4
+
+    values = struct.unpack_from(order + '7fI', payload, offset)
+    offset += 32
+
+    ranges = np.frombuffer(payload, dtype=order + 'f4', count=values[7], offset=offset)
+    offset += 4 * values[7]
+
+    count, = struct.unpack_from(order + 'I', payload, offset)
+    intensities = np.frombuffer(payload, dtype=order + 'f4', count=count, offset=offset + 4)
+
+    return LaserScan(Header(Time(sec, nsec), frame_id), *values[:7], ranges, intensities)
+
+
+@dataclass
+class Vector3(IdlStruct, typename="Vector3"):
+    x: float64
+    y: float64
+    z: float64
+
+
+@dataclass
+class Twist(IdlStruct, typename="Twist"):
+    linear: Vector3
+    angular: Vector3
+
+
+@dataclass
+class CameraFeedback(IdlStruct, typename="CameraFeedback"):
+    processed: uint32
+    dropped: uint32
+    fps: float32
+
+
+@dataclass
+class Telemetry(IdlStruct, typename="Telemetry"):
+    stamp: float64
+    angular_velocity: array[float32, 3]
+    linear_acceleration: array[float32, 3]
+    magnetic: array[float32, 3]
+    orientation: array[float32, 4]
+    present_current: array[int32, 2]
+    present_velocity: array[int32, 2]
+    present_position: array[int32, 2]
+
+
+def encode_twist(command):
+    linear, angular = command
+
+    return Twist(Vector3(linear, 0.0, 0.0), Vector3(0.0, 0.0, angular)).serialize()
+
+
 def message_callback(sample):
     print("MESSAGE RECEIVED : {}".format(sample.payload))
 
@@ -62,6 +136,21 @@ def calculate_distance_from_qr_code(points):
     return distance
 
 
+# instant scan panel: points closer than LIDAR_VIEW_RANGE millimeters, drawn as dots on a square of LIDAR_VIEW_SIZE
+# pixels centered on the lidar
+LIDAR_VIEW_SIZE = 300
+LIDAR_VIEW_RANGE = 750.0
+LIDAR_POINT_RADIUS = 5
+
+# 16 bit SLAM map pixels above this value are free cells, 100 in the 8 bit map of getmap
+MAP_FREE_THRESHOLD = 100 * 256 + 255
+
+# corners of a quad found in an image, in the order of the same corners found in the transposed image
+QUAD_TRANSPOSE_ORDER = [0, 3, 2, 1]
+
+# size of the display stream frames, the QR code control thresholds and the camera matrix are expressed in its pixels
+CAMERA_FRAME_SIZE = (400, 300)
+
 # manual mode
 MANUAL_MODE = 0
 
@@ -80,30 +169,80 @@ LIDAR_MODE = 2
 
 
 class MainView:
-    def __init__(self, width, height, session):
+    def __init__(self, width, height, session, slam_process=False, slam_threads=1):
         self.surface_configuration = (width, height)
         self.next_state = None
         self.session = session
 
-        self.qcd = cv2.QRCodeDetector()
+        # each consumer only receives its own tier of the camera streams: small grayscale frames for detection,
+        # color frames at a lower rate for display, decoded at reduced scale when they are larger than the panel
+        self.detect_ingest = CameraIngest(color=False)
+        self.display_ingest = CameraIngest(max_size=CAMERA_FRAME_SIZE)
+        self.qr_tracker = QRCodeTracker()
+
+        self.frame_pipeline = FramePipeline(max_workers=2)
 
-        self.camera_image_subscriber = self.session.declare_subscriber("turtle/camera", self.camera_image_callback)
-        self.camera_image = None
+        self.camera_detect_subscriber = self.session.declare_subscriber("turtle/camera/detect",
+                                                                        self.camera_detect_callback)
+        self.camera_display_subscriber = self.session.declare_subscriber("turtle/camera/display",
+                                                                         self.camera_display_callback)
+        self.camera_image = StreamImage(*CAMERA_FRAME_SIZE)
+        self.qr_overlay = (None, None)
 
         self.lidar_image_subscriber = self.session.declare_subscriber("turtle/lidar", self.lidar_scan_callback)
-        self.lidar_image = None
-        self.map_image = None
+        self.lidar_image = StreamImage(LIDAR_VIEW_SIZE, LIDAR_VIEW_SIZE)
+        self.map_image = StreamImage(300, 300)
 
         self.lidar_text = render_font(MOTO_MANGUCODE_10, "Instant Lidar Data", (0, 0, 0))
         self.map_text = render_font(MOTO_MANGUCODE_10, "Slam Map Data", (0, 0, 0))
 
         self.laser = Laser(360, 5, 359, 4000, 0, 0)
+
+        # one scan angle per degree
+        self.scan_angles = np.arange(360, dtype=np.float64)
+        self.scan_panel = ScanPanel(LIDAR_VIEW_SIZE, LIDAR_VIEW_RANGE, LIDAR_POINT_RADIUS)
+
         self.map_size_meters = 5
-        self.slam = RMHC_SLAM(self.laser, 600, self.map_size_meters)
-        self.map = bytearray(600 * 600)
         self.pos = (0, 0, 0)
 
+        # the SLAM either runs in the lidar callback or in a worker process that shares its map and pose
+        self.slam = None
+        self.slam_worker = None
+
+        # the position search stops at half the lidar period, so that a scan is done before the next one comes
+        slam_options = dict(search_threads=slam_threads, max_search_seconds=0.5 / self.laser.scan_rate_hz)
+
+        if slam_process:
+            self.slam_worker = SlamWorker(self.laser, 600, self.map_size_meters, **slam_options)
+        else:
+            self.slam = RMHC_SLAM(self.laser, 600, self.map_size_meters, **slam_options)
+
+        # the render thread reads the 16 bit pixels of the SLAM map in place, never during a SLAM update
+        self.map_lock = threading.Lock()
+        self.map_dirty = False
+        self.map_pos = (0, 0, 0)
+        self.map_view = np.asarray(self.slam.getmapview()) if self.slam is not None else None
+
+        self.map_binary = np.empty((600, 600), dtype=np.uint8)
+        self.map_small = np.empty((300, 300), dtype=np.uint8)
+        self.map_rotated = np.empty((300, 300), dtype=np.uint8)
+        self.map_buffer = np.empty((300, 300, 3), dtype=np.uint8)
+
+        # IMU and wheel odometry of the motor controller, the latest block replaces the previous one
+        self.telemetry_subscriber = self.session.declare_subscriber("turtle/telemetry", self.telemetry_callback)
+        self.telemetry = None
+
+        # the whole command is sent each time, a Twist carrying both the linear and the angular velocities, only when
+        # it changed or as a keepalive
         self.cmd_vel_publisher = self.session.declare_publisher("turtle/cmd_vel")
+        self.command_publisher = CommandPublisher(self.cmd_vel_publisher, encode_twist)
+        self.linear_velocity = 0.0
+        self.angular_velocity = 0.0
+
+        # frame counters sent back to the turtle, which adapts the camera stream to what we manage to process
+        self.camera_feedback_publisher = self.session.declare_publisher("turtle/camera/feedback")
+        self.camera_feedback_period = 1.0
+        self.last_camera_feedback = (time.monotonic(), 0)
         self.message_publisher = self.session.declare_publisher("turtle/debug_message")
         self.message_subscriber = self.session.declare_subscriber("turtle/debug_message", message_callback)
 
@@ -120,6 +259,7 @@ class MainView:
         # QRcode Mode PID control: w--rotation l--longitudinal
         self.qr_code_center_x = 0
         self.distance_to_qr_code = 0
+        self.bearing_to_qr_code = 0
         self.uPrevious_w = 0
         self.uCurent_w = 0
         self.setValue_w = 0
@@ -158,126 +298,180 @@ class MainView:
         self.camera_distortion = np.array(
             [0.0212284835698144, 0.8546829039917951, 0.0034281408326615323, 0.0005749116561059772, -3.217248182814475])
 
+        self.pose_estimator = QRPoseEstimator(self.camera_matrix, self.camera_distortion)
+
     def quit(self):
-        self.camera_image_subscriber.undeclare()
+        # no frame may be submitted once the pipeline is shut down
+        self.camera_detect_subscriber.undeclare()
+        self.camera_display_subscriber.undeclare()
+        self.frame_pipeline.quit()
+
+        # nor a scan to the SLAM worker once it is stopped
         self.lidar_image_subscriber.undeclare()
+
+        if self.slam_worker is not None:
+            self.slam_worker.quit()
+
+        self.telemetry_subscriber.undeclare()
         self.cmd_vel_publisher.undeclare()
+        self.camera_feedback_publisher.undeclare()
         self.message_publisher.undeclare()
         self.message_subscriber.undeclare()
 
     def calculate_qr_code_coords(self, quad):
+        # the returned points are pixel coordinates of each unit vector, empty arrays if no pose was found
+        return self.pose_estimator.estimate(quad)
 
-        # Selected coordinate points for each corner of QR code.
-        qr_edges = np.array([[0, 0, 0],
-                             [0, 1, 0],
-                             [1, 1, 0],
-                             [1, 0, 0]], dtype='float32').reshape((4, 1, 3))
+    def camera_detect_callback(self, sample):
+        # only hand the payload over, decoding and detection run on the frame pipeline
+        self.frame_pipeline.submit("turtle/camera/detect", self.process_detect_frame, sample.value.payload)
 
-        # determine the orientation of QR code coordinate system with respect to camera coorindate system.
-        ret, rvec, tvec = cv2.solvePnP(qr_edges, quad, self.camera_matrix, self.camera_distortion)
+    def camera_display_callback(self, sample):
+        self.frame_pipeline.submit("turtle/camera/display", self.process_display_frame, sample.value.payload)
 
-        # Define unit xyz axes. These are then projected to camera view using the rotation matrix and translation
-        # vector.
+    def process_detect_frame(self, payload):
+        image = self.detect_ingest.decode(payload)
 
-        unitv_points = np.array([[0, 0, 0], [1, 0, 0], [0, 1, 0], [0, 0, 1]], dtype='float32').reshape((4, 1, 3))
-        if ret:
-            points, jac = cv2.projectPoints(unitv_points, rvec, tvec, self.camera_matrix, self.camera_distortion)
-            # the returned points are pixel coordinates of each unit vector.
-            return points, rvec, tvec
+        if image is None:
+            return
 
-        # return empty arrays if rotation and translation values not found
-        else:
-            return [], [], []
+        # the detection stream is smaller than the display one, control and pose estimation work in display pixels of
+        # the transposed frame: the image is not transposed, the coordinates of the quad are swapped instead, and its
+        # corners taken in reverse order from the first one, since a transpose is a mirror
+        scale = CAMERA_FRAME_SIZE[0] / image.shape[1]
+        image_shape = (image.shape[1] * scale, image.shape[0] * scale)
 
-    def camera_image_callback(self, sample):
-        image = np.frombuffer(bytes(sample.value.payload), dtype=np.uint8)
-        image = cv2.imdecode(image, 1)
-        image = cv2.rotate(image, cv2.ROTATE_90_COUNTERCLOCKWISE)
-        image = cv2.flip(image, 0)
+        self.qr_tracker.optical_flow = self.mode == QR_CODE_MODE
+        points = self.qr_tracker.detect(image)
+        quad = points[0][QUAD_TRANSPOSE_ORDER, ::-1] * scale if points is not None else None
 
-        ret_qr, decoded_info, points, _ = self.qcd.detectAndDecodeMulti(image)
-        quad = points[0] if points is not None else None
+        axis_points = None
 
         if points is not None:
-            image = cv2.polylines(image, points.astype(int), True, (255, 0, 0), 3)
-
             self.qr_code_center_x = np.mean(quad[:, 1])
 
             axis_points, rvec, tvec = self.calculate_qr_code_coords(quad)
-            self.distance_to_qr_code = np.linalg.norm(tvec) * 4
-
-            # BGR color format
-            colors = [(255, 0, 0), (0, 255, 0), (0, 0, 255), (0, 0, 0)]
+            self.distance_to_qr_code = self.pose_estimator.distance
+            self.bearing_to_qr_code = self.pose_estimator.bearing
 
-            # check axes points are projected to camera view.
             if len(axis_points) > 0:
                 axis_points = axis_points.reshape((4, 2))
+            else:
+                axis_points = None
+        else:
+            self.pose_estimator.reset()
+
+        self.qr_overlay = (quad, axis_points)
+
+        self.update_state(image_shape, quad)
+
+    def process_display_frame(self, payload):
+        image = self.display_ingest.decode(payload)
+
+        if image is None:
+            return
 
-                origin = (int(axis_points[0][0]), int(axis_points[0][1]))
+        # the overlay is in pixels of the transposed frame, its coordinates are swapped to draw on the image as decoded
+        quad, axis_points = self.qr_overlay
+        scale = image.shape[1] / CAMERA_FRAME_SIZE[0]
 
-                for p, c in zip(axis_points[1:], colors[:3]):
-                    p = (int(p[0]), int(p[1]))
+        if quad is not None:
+            image = cv2.polylines(image, [(quad[:, ::-1] * scale).astype(int)], True, (255, 0, 0), 3)
 
-                    # Sometimes qr detector will make a mistake and projected point will overflow integer value. We skip
-                    # these cases.
-                    if origin[0] > 5 * image.shape[1] or origin[1] > 5 * image.shape[1]: break
-                    if p[0] > 5 * image.shape[1] or p[1] > 5 * image.shape[1]: break
+        # BGR color format
+        colors = [(255, 0, 0), (0, 255, 0), (0, 0, 255), (0, 0, 0)]
 
-                    cv2.line(image, origin, p, c, 5)
+        # check axes points are projected to camera view.
+        if axis_points is not None:
+            axis_points = axis_points[:, ::-1] * scale
 
-        self.update_state(image.shape, quad)
+            origin = (int(axis_points[0][0]), int(axis_points[0][1]))
 
-        self.camera_image = pygame.surfarray.make_surface(image)
+            for p, c in zip(axis_points[1:], colors[:3]):
+                p = (int(p[0]), int(p[1]))
+
+                # Sometimes qr detector will make a mistake and projected point will overflow integer value. We skip
+                # these cases.
+                if origin[0] > 5 * image.shape[0] or origin[1] > 5 * image.shape[0]: break
+                if p[0] > 5 * image.shape[0] or p[1] > 5 * image.shape[0]: break
+
+                cv2.line(image, origin, p, c, 5)
+
+        # the panel takes the transposed view, blit_array transposes while uploading
+        self.camera_image.update(image.transpose(1, 0, 2))
+
+    def telemetry_callback(self, sample):
+        self.telemetry = Telemetry.deserialize(sample.payload)
 
     def lidar_scan_callback(self, sample):
-        scan = LaserScan.deserialize(sample.payload)
+        scan = decode_laser_scan(sample.payload)
+
+        distances = np.multiply(scan.ranges, 1000.0, dtype=np.float64)
 
-        angles = list(range(0, 360))
-        distances = list(map(lambda z: z * 1000.0, scan.ranges))
+        if self.slam_worker is not None:
+            self.slam_worker.submit(distances)
+            self.draw_scan(distances)
+            return
+
+        with self.map_lock:
+            self.slam.update(scans_mm=distances, scan_angles_degrees=self.scan_angles)
+            self.set_pos(self.slam.getpos())
+
+            self.map_pos = self.pos
+            self.map_dirty = True
 
-        self.slam.update(scans_mm=distances, scan_angles_degrees=angles)
-        self.slam.getmap(self.map)
+        self.draw_scan(distances)
 
+    def set_pos(self, pos):
         # transform into meters + translate in order to center the map
-        self.pos = self.slam.getpos()
-        self.pos = (self.pos[0] / 10, self.pos[1] / 10, self.pos[2])
+        self.pos = (pos[0] / 10, pos[1] / 10, pos[2])
         self.pos = (
             self.pos[0] - self.map_size_meters * 100 / 2, self.pos[1] - self.map_size_meters * 100 / 2, self.pos[2])
 
-        # transform map bytearray into a pygame image
-        map_image = np.array(self.map).reshape((600, 600))
-        _, map_image = cv2.threshold(map_image, 100, 255, cv2.THRESH_BINARY)
-        map_image = cv2.rotate(map_image, cv2.ROTATE_90_COUNTERCLOCKWISE)
-        map_image = cv2.cvtColor(map_image, cv2.COLOR_GRAY2RGB)
+    def draw_map(self):
+        # render thread, only when the map changed since the last frame
+        if self.slam_worker is not None:
+            # free cells, above 100, are white and obstacles black
+            pose = self.slam_worker.read_map(
+                lambda slam_map: cv2.threshold(slam_map, 100, 255, cv2.THRESH_BINARY, dst=self.map_binary))
 
-        x = int(300 + self.pos[1])
-        y = int(300 - self.pos[0])
+            # unchanged, or the worker is writing the map, the next frame tries again
+            if pose is None:
+                return
 
-        map_image = cv2.circle(map_image, (x, y), 10, (0, 0, 255), -1)
+            self.set_pos(pose)
+            pos = self.pos
+        else:
+            # a SLAM update is running, the next frame tries again
+            if not self.map_lock.acquire(blocking=False):
+                return
 
-        map_image = cv2.resize(map_image, (300, 300))
+            try:
+                if not self.map_dirty:
+                    return
 
-        self.map_image = pygame.surfarray.make_surface(map_image)
+                # free cells, above 100 once shifted to 8 bits, are white and obstacles black
+                cv2.compare(self.map_view, MAP_FREE_THRESHOLD, cv2.CMP_GT, dst=self.map_binary)
 
-        # draw instant scan on a pygame image
+                pos = self.map_pos
+                self.map_dirty = False
+            finally:
+                self.map_lock.release()
 
-        lidar_image = np.zeros((600, 600, 3), dtype=np.uint8)
+        # every step writes into a buffer kept between frames
+        cv2.resize(self.map_binary, (300, 300), dst=self.map_small)
+        cv2.rotate(self.map_small, cv2.ROTATE_90_COUNTERCLOCKWISE, dst=self.map_rotated)
+        cv2.cvtColor(self.map_rotated, cv2.COLOR_GRAY2RGB, dst=self.map_buffer)
 
-        for i, distance in enumerate(distances):
-            if distance < 750:
-                # fit the distance inside the window
-                real_distance = distance / 750.0 * 300.0
+        x = int(150 + pos[1] / 2)
+        y = int(150 - pos[0] / 2)
 
-                angle = np.radians(angles[i])
-                x = int(300.0 + real_distance * np.cos(angle))
-                y = int(300.0 + real_distance * np.sin(angle))
+        cv2.circle(self.map_buffer, (x, y), 5, (0, 0, 255), -1)
 
-                lidar_image = cv2.circle(lidar_image, (x, y), 10, (0, 255, 0), -1)
+        self.map_image.update(self.map_buffer)
 
-        lidar_image = cv2.circle(lidar_image, (300, 300), 10, (255, 255, 255), -1)
-        lidar_image = cv2.rotate(lidar_image, cv2.ROTATE_90_COUNTERCLOCKWISE)
-        lidar_image = cv2.resize(lidar_image, (300, 300))
-        self.lidar_image = pygame.surfarray.make_surface(lidar_image)
+    def draw_scan(self, distances):
+        self.lidar_image.update(self.scan_panel.draw(distances))
 
     def update_state(self, image_shape, quad):
         alignment_tolerance = 50
@@ -307,8 +501,16 @@ class MainView:
         self.destination = dest
 
     def set_movement(self, linear, angular):
-        self.cmd_vel_publisher.put(("Forward", linear))
-        self.cmd_vel_publisher.put(("Rotate", angular))
+        self.linear_velocity = float(linear)
+        self.angular_velocity = float(angular)
+
+        self.command_publisher.set((self.linear_velocity, self.angular_velocity))
+
+    def set_linear_velocity(self, linear):
+        self.set_movement(linear, self.angular_velocity)
+
+    def set_angular_velocity(self, angular):
+        self.set_movement(self.linear_velocity, angular)
 
     def go_to_destination(self):
         alignment_tolerance = 4  # degree
@@ -341,35 +543,35 @@ class MainView:
 
     def turtle_up(self):
         if self.mode == MANUAL_MODE:
-            self.cmd_vel_publisher.put(("Forward", 20.0))
+            self.set_linear_velocity(20.0)
 
     def turtle_down(self):
         if self.mode == MANUAL_MODE:
-            self.cmd_vel_publisher.put(("Forward", -20.0))
+            self.set_linear_velocity(-20.0)
 
     def turtle_left(self):
         if self.mode == MANUAL_MODE:
-            self.cmd_vel_publisher.put(("Rotate", 100.0))
+            self.set_angular_velocity(100.0)
 
     def turtle_right(self):
         if self.mode == MANUAL_MODE:
-            self.cmd_vel_publisher.put(("Rotate", -100.0))
+            self.set_angular_velocity(-100.0)
 
     def turtle_standby_up(self):
         if self.mode == MANUAL_MODE:
-            self.cmd_vel_publisher.put(("Forward", 0.0))
+            self.set_linear_velocity(0.0)
 
     def turtle_standby_down(self):
         if self.mode == MANUAL_MODE:
-            self.cmd_vel_publisher.put(("Forward", 0.0))
+            self.set_linear_velocity(0.0)
 
     def turtle_standby_left(self):
         if self.mode == MANUAL_MODE:
-            self.cmd_vel_publisher.put(("Rotate", 0.0))
+            self.set_angular_velocity(0.0)
 
     def turtle_standby_right(self):
         if self.mode == MANUAL_MODE:
-            self.cmd_vel_publisher.put(("Rotate", 0.0))
+            self.set_angular_velocity(0.0)
 
     def switch_to_manual(self):
         self.mode = MANUAL_MODE
@@ -400,16 +602,32 @@ class MainView:
     def mouse_motion(self, event):
         self.interface.mouse_motion(event)
 
+    def publish_camera_feedback(self):
+        now = time.monotonic()
+        last_time, last_processed = self.last_camera_feedback
+
+        if now - last_time < self.camera_feedback_period:
+            return
+
+        processed, dropped = self.frame_pipeline.stats("turtle/camera/detect")
+        fps = (processed - last_processed) / (now - last_time)
+
+        self.camera_feedback_publisher.put(CameraFeedback(processed, dropped, fps).serialize())
+        self.last_camera_feedback = (now, processed)
+
     def update(self):
         self.interface.update()
 
+        self.publish_camera_feedback()
+        self.command_publisher.tick()
+
+        if self.slam_worker is not None:
+            self.set_pos(self.slam_worker.getpos())
+
         if self.mode == QR_CODE_MODE:
             if self.state != self.last_state:
 
-                self.cmd_vel_publisher.put(("Forward", 0.0))
-                self.cmd_vel_publisher.put(("Rotate", 0.0))
-
-                err_w = -self.qr_code_center_x + self.camera_image.get_width() / 2
+                err_w = -self.qr_code_center_x + CAMERA_FRAME_SIZE[0] / 2
                 err_l = self.distance_to_qr_code - 30
 
                 dErr_w = err_w - self.lastErr_w
@@ -426,18 +644,19 @@ class MainView:
 
                 vel_l = np.min([vel_l, 20])
 
+                # the velocity that is not driven by the state is stopped in the same command
                 match self.state:
 
                     case 1:
-                        self.cmd_vel_publisher.put(("Rotate", vel_w))
+                        self.set_movement(0.0, vel_w)
                     case 2:
-                        self.cmd_vel_publisher.put(("Rotate", vel_w))
+                        self.set_movement(0.0, vel_w)
                     case 3:
-                        self.cmd_vel_publisher.put(("Forward", vel_l))
+                        self.set_movement(vel_l, 0.0)
                     case 4:
-                        self.cmd_vel_publisher.put(("Forward", vel_l))
+                        self.set_movement(vel_l, 0.0)
                     case _:
-                        pass
+                        self.set_movement(0.0, 0.0)
 
                 self.last_state = self.state
 
@@ -447,27 +666,59 @@ class MainView:
     def render(self, surface):
         surface.fill(IVORY)
 
-        if self.camera_image is not None:
-            surface.draw_rect(DARKBLUE, pygame.Rect(10, 10, self.camera_image.get_width() + 10,
-                                                    self.camera_image.get_height() + 10))
-            surface.blit(self.camera_image, 15, 15)
+        # upload the panels that received new data since the last frame
+        self.camera_image.refresh()
+        self.lidar_image.refresh()
 
-        if self.lidar_image is not None:
-            surface.draw_rect(DARKBLUE, pygame.Rect(960, 20, self.lidar_image.get_width() + 10,
-                                                    self.lidar_image.get_height() + 10))
-            surface.blit(self.lidar_image, 965, 25)
+        self.draw_map()
+        self.map_image.refresh()
+
+        if self.camera_image.ready:
+            surface.draw_rect(DARKBLUE, pygame.Rect(10, 10, self.camera_image.width + 10,
+                                                    self.camera_image.height + 10))
+            surface.draw_image(self.camera_image, 15, 15)
+
+        if self.lidar_image.ready:
+            surface.draw_rect(DARKBLUE, pygame.Rect(960, 20, self.lidar_image.width + 10,
+                                                    self.lidar_image.height + 10))
+            surface.draw_image(self.lidar_image, 965, 25)
 
             surface.draw_image(self.lidar_text, 1050, 335)
 
-        if self.map_image is not None:
-            surface.draw_rect(DARKBLUE, pygame.Rect(960, 400, self.map_image.get_width() + 10,
-                                                    self.map_image.get_height() + 10))
-            surface.blit(self.map_image, 965, 405)
+        if self.map_image.ready:
+            surface.draw_rect(DARKBLUE, pygame.Rect(960, 400, self.map_image.width + 10,
+                                                    self.map_image.height + 10))
+            surface.draw_image(self.map_image, 965, 405)
 
             surface.draw_image(self.map_text, 1075, 385)
 
-        text = render_font(MOTO_MANGUCODE_30, f'Distance: {self.distance_to_qr_code:.2f}cm', (0, 0, 0))
+        text = render_font(MOTO_MANGUCODE_30, f'Distance: {self.distance_to_qr_code:.2f}cm, '
+                                              f'bearing {self.bearing_to_qr_code:.1f}deg', (0, 0, 0))
 
         surface.draw_image(text, 50, 400)
 
+        processed, dropped = self.frame_pipeline.stats("turtle/camera/detect")
+        text = render_font(MOTO_MANGUCODE_10, f'Camera frames: {processed} processed, {dropped} dropped', (0, 0, 0))
+
+        surface.draw_image(text, 50, 440)
+
+        text = render_font(MOTO_MANGUCODE_10, f'QR corners: {self.qr_tracker.tracked_ratio() * 100:.0f}% tracked, '
+                                              f'drift {self.qr_tracker.drift:.1f}px', (0, 0, 0))
+
+        surface.draw_image(text, 50, 455)
+
+        telemetry = self.telemetry
+        if telemetry is not None:
+            text = render_font(MOTO_MANGUCODE_10, f'Wheels: position {telemetry.present_position[0]} / '
+                                                  f'{telemetry.present_position[1]}, velocity '
+                                                  f'{telemetry.present_velocity[0]} / {telemetry.present_velocity[1]}',
+                               (0, 0, 0))
+
+            surface.draw_image(text, 50, 470)
+
+        text = render_font(MOTO_MANGUCODE_10, f'Commands: {self.command_publisher.sent} sent, '
+                                              f'{self.command_publisher.suppressed} suppressed', (0, 0, 0))
+
+        surface.draw_image(text, 50, 485)
+
         self.interface.render(surface)
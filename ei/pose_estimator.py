@@ -0,0 +1,70 @@
+import cv2
+import numpy as np
+
+# QR code corners in the order required by SOLVEPNP_IPPE_SQUARE, a unit square centered on the origin. Compared to the
+# former [0, 0], [0, 1], [1, 1], [1, 0] model, the code frame is rotated by a quarter turn.
+QR_EDGES = np.array([[-0.5, 0.5, 0],
+                     [0.5, 0.5, 0],
+                     [0.5, -0.5, 0],
+                     [-0.5, -0.5, 0]], dtype='float32').reshape((4, 1, 3))
+
+# origin and unit x, y, z axes, expressed so that the drawn axes keep their former directions on the code
+UNITV_POINTS = np.array([[0, 0, 0], [0, -1, 0], [1, 0, 0], [0, 0, 1]], dtype='float32').reshape((4, 1, 3))
+
+
+class QRPoseEstimator:
+    def __init__(self, camera_matrix, camera_distortion, smoothing=0.3, distance_scale=4):
+        self.camera_matrix = camera_matrix
+        self.camera_distortion = camera_distortion
+
+        # weight of a new measurement in the exponential smoothing of distance and bearing
+        self.smoothing = smoothing
+
+        # QR code side length in the unit of the distance
+        self.distance_scale = distance_scale
+
+        self.rvec = None
+        self.tvec = None
+
+        self.distance = 0.0
+        self.bearing = 0.0
+
+    def reset(self):
+        self.rvec = None
+        self.tvec = None
+
+    def estimate(self, quad):
+        # IPPE_SQUARE is a closed form solution, it returns both poses of the planar ambiguity
+        ret, rvecs, tvecs, _ = cv2.solvePnPGeneric(QR_EDGES, quad, self.camera_matrix, self.camera_distortion,
+                                                   flags=cv2.SOLVEPNP_IPPE_SQUARE)
+
+        if not ret:
+            self.reset()
+            return [], [], []
+
+        # the previous pose picks the solution, which keeps the axes from flipping between frames
+        index = 0
+        if self.rvec is not None and len(rvecs) > 1:
+            index = int(np.argmin([np.linalg.norm(rvec - self.rvec) for rvec in rvecs]))
+
+        rvec, tvec = rvecs[index], tvecs[index]
+
+        distance = np.linalg.norm(tvec) * self.distance_scale
+
+        # the quad is in pixels of the transposed frame, the horizontal axis of the picture is the y axis of the
+        # solver. The bearing is positive with the code left of the center, the sign of the steering error.
+        bearing = np.degrees(np.arctan2(-tvec[1, 0], tvec[2, 0]))
+
+        if self.rvec is None:
+            self.distance = distance
+            self.bearing = bearing
+        else:
+            self.distance += self.smoothing * (distance - self.distance)
+            self.bearing += self.smoothing * (bearing - self.bearing)
+
+        self.rvec = rvec
+        self.tvec = tvec
+
+        points, jac = cv2.projectPoints(UNITV_POINTS, rvec, tvec, self.camera_matrix, self.camera_distortion)
+
+        return points, rvec, tvec
@@ -0,0 +1,236 @@
+import cv2
+import numpy as np
+
+
+class QRCodeTracker:
+    def __init__(self, roi_margin=0.6, max_roi_size=240, max_misses=5, flow_interval=5, min_quad_area=100,
+                 max_decode_attempts=3):
+        self.detector = cv2.QRCodeDetector()
+
+        # between detections the corners are carried with pyramidal Lucas-Kanade optical flow, a full detection runs
+        # every flow_interval frames or as soon as the tracked quad degenerates
+        self.optical_flow = False
+        self.flow_interval = flow_interval
+        self.min_quad_area = min_quad_area
+        self.flow_parameters = dict(winSize=(21, 21), maxLevel=3,
+                                    criteria=(cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_COUNT, 20, 0.03))
+
+        # the search region is the bounding box of the last quad, enlarged by roi_margin times its size on each side
+        self.roi_margin = roi_margin
+
+        # regions larger than this are downscaled before the search
+        self.max_roi_size = max_roi_size
+
+        # number of consecutive misses around the last quad before searching the whole frame again
+        self.max_misses = max_misses
+
+        self.quad = None
+        self.misses = 0
+
+        self.previous_gray = None
+        self.frames_since_detection = 0
+
+        # grayscale frames alternate between two buffers, the previous one is kept for optical flow
+        self.gray_buffers = [None, None]
+        self.current_gray = 0
+
+        # a track starts with a detection from scratch and ends when the marker is lost, its payload is decoded once.
+        # A code that does not decode is tried on the first max_decode_attempts frames of the track only, the next
+        # track, after a full detection, tries again
+        self.track_id = 0
+        self.payloads = {}
+        self.max_decode_attempts = max_decode_attempts
+        self.decode_attempts = 0
+
+        self.full_searches = 0
+        self.roi_searches = 0
+        self.decodes = 0
+
+        self.tracked_frames = 0
+        self.detected_frames = 0
+
+        # mean distance in pixels between the corners carried by optical flow and the next detection
+        self.drift = 0.0
+
+    @property
+    def payload(self):
+        return self.payloads.get(self.track_id)
+
+    def reset(self):
+        self.lose_track()
+
+    def lose_track(self):
+        self.payloads.pop(self.track_id, None)
+
+        self.quad = None
+        self.misses = 0
+
+    def tracked_ratio(self):
+        total = self.tracked_frames + self.detected_frames
+
+        return self.tracked_frames / total if total > 0 else 0.0
+
+    def grayscale(self, image):
+        self.current_gray = 1 - self.current_gray
+        gray = self.gray_buffers[self.current_gray]
+
+        if gray is None or gray.shape != image.shape[:2]:
+            gray = np.empty(image.shape[:2], dtype=np.uint8)
+            self.gray_buffers[self.current_gray] = gray
+
+        if image.ndim == 2:
+            np.copyto(gray, image)
+        else:
+            cv2.cvtColor(image, cv2.COLOR_BGR2GRAY, gray)
+
+        return gray
+
+    def detect(self, image):
+        gray = self.grayscale(image)
+
+        points = None
+        flow_quad = None
+        detection_missed = False
+
+        if self.optical_flow and self.quad is not None and self.previous_gray is not None:
+            flow_quad = self.track_flow(gray)
+
+            if flow_quad is not None and self.frames_since_detection < self.flow_interval:
+                points = flow_quad[np.newaxis]
+
+        if points is not None:
+            self.tracked_frames += 1
+            self.frames_since_detection += 1
+        else:
+            points = self.detect_corners(gray)
+
+            if points is not None:
+                self.detected_frames += 1
+                self.frames_since_detection = 0
+
+                if flow_quad is not None:
+                    self.drift = float(np.mean(np.linalg.norm(points[0] - flow_quad, axis=1)))
+            elif flow_quad is not None and self.quad is not None:
+                # the detection missed but the flow did not, its corners carry the track until max_misses detections
+                # in a row have missed or the flow quad degenerates
+                points = flow_quad[np.newaxis]
+                detection_missed = True
+
+                self.tracked_frames += 1
+
+        if points is not None:
+            if self.quad is None:
+                self.track_id += 1
+                self.decode_attempts = 0
+
+            self.quad = points[0]
+
+            if not detection_missed:
+                self.misses = 0
+
+            if not self.payload and self.decode_attempts < self.max_decode_attempts:
+                self.decode(gray, points[:1])
+
+        self.previous_gray = gray
+
+        return points
+
+    def track_flow(self, gray):
+        if self.previous_gray.shape != gray.shape:
+            return None
+
+        corners = self.quad.reshape((4, 1, 2)).astype(np.float32)
+        corners, status, _ = cv2.calcOpticalFlowPyrLK(self.previous_gray, gray, corners, None, **self.flow_parameters)
+
+        if corners is None or not status.all():
+            return None
+
+        quad = corners.reshape((4, 2))
+
+        if self.is_degenerate(quad):
+            return None
+
+        return quad
+
+    def is_degenerate(self, quad):
+        if not cv2.isContourConvex(quad):
+            return True
+
+        if cv2.contourArea(quad) < self.min_quad_area:
+            return True
+
+        sides = np.linalg.norm(quad - np.roll(quad, 1, axis=0), axis=1)
+
+        return sides.min() < 0.3 * sides.max()
+
+    def detect_corners(self, image):
+        if self.quad is None:
+            points = self.detect_full(image)
+        else:
+            points = self.detect_roi(image)
+
+            if points is None:
+                self.misses += 1
+
+                if self.misses >= self.max_misses:
+                    self.lose_track()
+                    points = self.detect_full(image)
+
+        return points
+
+    def decode(self, image, points):
+        self.decodes += 1
+        self.decode_attempts += 1
+
+        ret, decoded_info, _ = self.detector.decodeMulti(image, points)
+
+        # an empty payload means decoding failed, it is retried on the next frames of the same track
+        if ret and decoded_info[0]:
+            self.payloads[self.track_id] = decoded_info[0]
+
+    def detect_full(self, image):
+        self.full_searches += 1
+
+        return self.search(image)
+
+    def detect_roi(self, image):
+        self.roi_searches += 1
+
+        height, width = image.shape[:2]
+
+        x_min, y_min = self.quad.min(axis=0)
+        x_max, y_max = self.quad.max(axis=0)
+
+        margin_x = (x_max - x_min) * self.roi_margin
+        margin_y = (y_max - y_min) * self.roi_margin
+
+        x0 = int(max(x_min - margin_x, 0))
+        y0 = int(max(y_min - margin_y, 0))
+        x1 = int(min(x_max + margin_x, width))
+        y1 = int(min(y_max + margin_y, height))
+
+        if x1 - x0 < 8 or y1 - y0 < 8:
+            return None
+
+        roi = image[y0:y1, x0:x1]
+
+        scale = min(1.0, self.max_roi_size / max(x1 - x0, y1 - y0))
+        if scale < 1.0:
+            roi = cv2.resize(roi, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+
+        points = self.search(roi)
+
+        if points is None:
+            return None
+
+        # back to full frame coordinates
+        return (points / scale + np.array([x0, y0], dtype=np.float32)).astype(np.float32)
+
+    def search(self, image):
+        # corners only, decoding is done once per track
+        ret, points = self.detector.detectMulti(image)
+
+        if not ret or points is None:
+            return None
+
+        return points
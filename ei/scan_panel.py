@@ -0,0 +1,45 @@
+import cv2
+import numpy as np
+
+
+class ScanPanel:
+    def __init__(self, size=300, view_range=750.0, point_radius=5):
+        # points closer than view_range millimeters, drawn as dots on a square of size pixels centered on the lidar
+        self.size = size
+        self.view_range = view_range
+        self.point_radius = point_radius
+
+        # one scan angle per degree, the panel offsets of a point at 1 mm are computed once for every angle
+        radians = np.radians(np.arange(360))
+        self.rows = -np.cos(radians) * (size / 2 / view_range)
+        self.cols = np.sin(radians) * (size / 2 / view_range)
+
+        # the panel is drawn inside a canvas with a margin of one dot radius, so that dots never wrap around the
+        # rows, and each dot is stamped as the flat offsets of the green pixels of a disk
+        margin = point_radius
+        self.canvas = np.zeros((size + 2 * margin, size + 2 * margin, 3), dtype=np.uint8)
+        self.buffer = self.canvas[margin:-margin, margin:-margin]
+
+        disk = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (2 * margin + 1, 2 * margin + 1))
+        disk_rows, disk_cols = np.nonzero(disk)
+        self.disk = ((disk_rows * self.canvas.shape[1] + disk_cols) * 3 + 1).astype(np.intp)
+
+    def draw(self, distances):
+        # all the dots of the scan are drawn at once
+        near = distances < self.view_range
+        center = self.size // 2
+
+        rows = (center + distances[near] * self.rows[near]).astype(np.intp)
+        cols = (center + distances[near] * self.cols[near]).astype(np.intp)
+
+        np.clip(rows, 0, self.size - 1, out=rows)
+        np.clip(cols, 0, self.size - 1, out=cols)
+
+        # the top left corner of the disk of a point, in the canvas, is the point itself in the panel
+        corners = (rows * self.canvas.shape[1] + cols) * 3
+
+        self.canvas.fill(0)
+        self.canvas.reshape(-1)[corners[:, None] + self.disk] = 255
+        cv2.circle(self.buffer, (center, center), self.point_radius, (255, 255, 255), -1)
+
+        return self.buffer
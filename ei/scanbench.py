@@ -0,0 +1,69 @@
+# Times the drawing of the instant lidar scan panel: the original loop, one cv2.circle per point on a 600x600 image
+# then rotated and shrunk to the panel, against the dots stamped at once by ScanPanel. Both draw random scans of a
+# room, and the dot pixels of the two panels are compared, as a check that the dots land in the same places.
+#
+# Usage: python -m ei.scanbench [scans]
+
+import sys
+import time
+
+import cv2
+import numpy as np
+
+from ei.scan_panel import ScanPanel
+
+
+def draw_original(distances):
+    lidar_image = np.zeros((600, 600, 3), dtype=np.uint8)
+
+    for i, distance in enumerate(distances):
+        if distance < 750:
+            # fit the distance inside the window
+            real_distance = distance / 750.0 * 300.0
+
+            angle = np.radians(i)
+            x = int(300.0 + real_distance * np.cos(angle))
+            y = int(300.0 + real_distance * np.sin(angle))
+
+            lidar_image = cv2.circle(lidar_image, (x, y), 10, (0, 255, 0), -1)
+
+    lidar_image = cv2.circle(lidar_image, (300, 300), 10, (255, 255, 255), -1)
+    lidar_image = cv2.rotate(lidar_image, cv2.ROTATE_90_COUNTERCLOCKWISE)
+
+    return cv2.resize(lidar_image, (300, 300))
+
+
+def timed(draw, scans):
+    start = time.perf_counter()
+
+    for distances in scans:
+        draw(distances)
+
+    return (time.perf_counter() - start) / len(scans)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+
+    # a wall at 400 to 1000 millimeters, two thirds of the points within the 750 millimeters of the panel
+    random = np.random.RandomState(0)
+    scans = [400 + 600 * random.rand(360) for _ in range(count)]
+
+    panel = ScanPanel()
+
+    original = timed(draw_original, scans)
+    stamped = timed(panel.draw, scans)
+
+    # dots are the pixels more than half green, the shrunk original has blended edges
+    original_dots = np.array([draw_original(distances)[:, :, 1] > 127 for distances in scans[:20]])
+    stamped_dots = np.array([panel.draw(distances)[:, :, 1] > 127 for distances in scans[:20]])
+
+    print('%d scans, %.0f points within range on average' %
+          (count, np.mean([np.sum(distances < 750) for distances in scans])))
+    print('  original %6.3f ms per scan' % (original * 1000))
+    print('  stamped  %6.3f ms per scan, %.1fx' % (stamped * 1000, original / stamped))
+    print('  dots cover %.1f %% of the panel in the original, %.1f %% stamped, %.1f %% of the pixels differ' %
+          (np.mean(original_dots) * 100, np.mean(stamped_dots) * 100, np.mean(original_dots != stamped_dots) * 100))
+
+
+main()
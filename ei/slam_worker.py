@@ -0,0 +1,153 @@
+import multiprocessing
+import queue
+
+import numpy as np
+
+from multiprocessing import shared_memory
+
+from breezyslam.algorithms import RMHC_SLAM
+
+# pose slot: sequence number, x and y in millimeters, theta in degrees. The sequence is odd while the worker writes the
+# map or the pose, a reader keeps what it read only if the sequence was even and did not change meanwhile.
+POSE_SLOT_SIZE = 4
+
+# reads give up after this many attempts, so that a worker that died or stalled in the middle of a write never blocks
+# the viewer: the pose falls back to the last consistent one, the map is read again on a later frame
+POSE_READ_ATTEMPTS = 100
+MAP_READ_ATTEMPTS = 2
+
+
+def run_slam(laser, map_size_pixels, map_size_meters, scans, map_name, pose_name, slam_options):
+    slam = RMHC_SLAM(laser, map_size_pixels, map_size_meters, **slam_options)
+    angles = np.arange(laser.scan_size, dtype=np.float64)
+
+    map_memory = shared_memory.SharedMemory(name=map_name)
+    pose_memory = shared_memory.SharedMemory(name=pose_name)
+
+    map_array = np.ndarray((map_size_pixels, map_size_pixels), dtype=np.uint8, buffer=map_memory.buf)
+    pose = np.ndarray(POSE_SLOT_SIZE, dtype=np.float64, buffer=pose_memory.buf)
+
+    while True:
+        distances = scans.get()
+
+        if distances is None:
+            break
+
+        slam.update(scans_mm=distances, scan_angles_degrees=angles)
+
+        # the map is written straight into the shared memory
+        pose[0] += 1
+        slam.getmap(map_array)
+        pose[1:] = slam.getpos()
+        pose[0] += 1
+
+    del map_array, pose
+
+    map_memory.close()
+    pose_memory.close()
+
+
+class SlamWorker:
+    def __init__(self, laser, map_size_pixels, map_size_meters, **slam_options):
+        self.map_memory = shared_memory.SharedMemory(create=True, size=map_size_pixels * map_size_pixels)
+        self.pose_memory = shared_memory.SharedMemory(create=True, size=POSE_SLOT_SIZE * 8)
+
+        # views over the shared memory, nothing is copied to read the map or the pose
+        self.map = np.ndarray((map_size_pixels, map_size_pixels), dtype=np.uint8, buffer=self.map_memory.buf)
+        self.pose = np.ndarray(POSE_SLOT_SIZE, dtype=np.float64, buffer=self.pose_memory.buf)
+
+        self.map.fill(127)
+        self.pose.fill(0)
+
+        self.last_pose = (0.0, 0.0, 0.0)
+        self.map_sequence = None
+
+        # once closed the worker is gone, the pose stays the last one read and the map no longer changes
+        self.closed = False
+
+        # a single pending scan, the ones arriving while the worker is busy with it are dropped
+        context = multiprocessing.get_context('spawn')
+        self.scans = context.Queue(maxsize=1)
+        self.dropped = 0
+
+        self.process = context.Process(target=run_slam, daemon=True,
+                                       args=(laser, map_size_pixels, map_size_meters, self.scans,
+                                             self.map_memory.name, self.pose_memory.name, slam_options))
+        self.process.start()
+
+    def submit(self, distances):
+        if self.closed:
+            return
+
+        try:
+            self.scans.put_nowait(distances)
+        except queue.Full:
+            self.dropped += 1
+
+    def sequence(self):
+        return int(self.pose[0])
+
+    def getpos(self):
+        if self.closed:
+            return self.last_pose
+
+        for _ in range(POSE_READ_ATTEMPTS):
+            sequence = self.sequence()
+            x, y, theta = self.pose[1:]
+
+            if sequence % 2 == 0 and self.sequence() == sequence:
+                self.last_pose = (x, y, theta)
+                break
+
+        return self.last_pose
+
+    def read_map(self, read):
+        # read(map) copies what it needs out of the shared map, returns the pose that goes with it, or None when the
+        # map did not change since the last read or no consistent copy was made
+        if self.closed:
+            return None
+
+        for _ in range(MAP_READ_ATTEMPTS):
+            sequence = self.sequence()
+
+            if sequence == self.map_sequence:
+                return None
+
+            if sequence % 2 == 1:
+                continue
+
+            read(self.map)
+            x, y, theta = self.pose[1:]
+
+            # the worker wrote the map meanwhile
+            if self.sequence() == sequence:
+                self.map_sequence = sequence
+                return x, y, theta
+
+        return None
+
+    def quit(self):
+        if self.closed:
+            return
+
+        self.closed = True
+
+        try:
+            self.scans.put(None, timeout=1.0)
+        except queue.Full:
+            pass
+
+        self.process.join(1.0)
+
+        if self.process.is_alive():
+            self.process.terminate()
+
+        # the views are swapped for copies, the shared memory can only be closed once nothing points into it. The
+        # names are unlinked first, so that the memory is released even if a view is still held elsewhere.
+        self.map = self.map.copy()
+        self.pose = self.pose.copy()
+
+        self.map_memory.unlink()
+        self.pose_memory.unlink()
+        self.map_memory.close()
+        self.pose_memory.close()
@@ -4,12 +4,12 @@ import zenoh
 
 
 class EiViewer:
-    def __init__(self, width, height, session):
+    def __init__(self, width, height, session, slam_process=False, slam_threads=1):
         self.session = session
         self.surface_configuration = (width, height)
 
         self.state = [
-            MainView(width, height, self.session),
+            MainView(width, height, self.session, slam_process, slam_threads),
         ]
 
         self.current_state = 0
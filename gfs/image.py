@@ -1,3 +1,6 @@
+import threading
+
+import numpy as np
 import pygame
 
 
@@ -25,4 +28,52 @@ class Image:
         return self.py_image.get_rect()
 
     def draw_disk(self, color, pos, radius):
-        pygame.draw.circle(self.py_image, color, pos, radius)
\ No newline at end of file
+        pygame.draw.circle(self.py_image, color, pos, radius)
+
+
+class StreamImage(Image):
+    def __init__(self, width, height):
+        # 24 bit surfaces share the (width, height, 3) layout of the arrays, uploads are a plain copy
+        Image.__init__(self, width, height)
+        self.py_image = pygame.Surface((width, height), depth=24)
+
+        self.lock = threading.Lock()
+        self.buffer = np.zeros((width, height, 3), dtype=np.uint8)
+        self.array = self.buffer
+
+        # dirty is set when new data arrives, ready once something has been uploaded
+        self.dirty = False
+        self.ready = False
+
+    def update(self, array):
+        # called from any thread, the surface itself is only touched by refresh on the render thread. The transposed
+        # view of a (height, width, 3) image is copied in the memory order of that image, far cheaper than a strided
+        # copy, and blit_array does the transpose while uploading.
+        with self.lock:
+            transposed = not array.flags.c_contiguous and array.transpose(1, 0, 2).flags.c_contiguous
+            source = array.transpose(1, 0, 2) if transposed else array
+
+            if self.buffer.shape != source.shape:
+                self.buffer = np.empty(source.shape, dtype=np.uint8)
+
+            np.copyto(self.buffer, source)
+
+            self.array = self.buffer.transpose(1, 0, 2) if transposed else self.buffer
+            self.dirty = True
+
+    def refresh(self):
+        with self.lock:
+            if not self.dirty:
+                return
+
+            width, height = self.array.shape[:2]
+
+            if self.py_image.get_size() != (width, height):
+                self.py_image = pygame.Surface((width, height), depth=24)
+                self.width = width
+                self.height = height
+
+            pygame.surfarray.blit_array(self.py_image, self.array)
+
+            self.dirty = False
+            self.ready = True
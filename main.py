@@ -1,3 +1,4 @@
+import argparse
 import pygame
 
 from gfs.surface import Surface, flip, events
@@ -11,6 +12,13 @@ import zenoh
 # olivier@zettascale.tech
 
 def main():
+    parser = argparse.ArgumentParser(description='ST4 EI1 turtle viewer')
+    parser.add_argument('--slam-process', action='store_true',
+                        help='run the SLAM in a worker process that shares its map and pose with the viewer')
+    parser.add_argument('--slam-threads', type=int, default=1,
+                        help='independent position searches run in parallel for each lidar scan')
+    args = parser.parse_args()
+
     surface = Surface(1280, 720, "ST4 EI1 - Interface!")
     clock = pygame.time.Clock()
 
@@ -18,7 +26,7 @@ def main():
     config = zenoh.Config.from_file("config.json")
     session = zenoh.open(config)
 
-    ei_viewer = EiViewer(surface.width, surface.height, session)
+    ei_viewer = EiViewer(surface.width, surface.height, session, args.slam_process, args.slam_threads)
 
     is_running = True
     timer = 0
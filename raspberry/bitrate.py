@@ -0,0 +1,96 @@
+import threading
+import time
+
+# (scale of the frame size, JPEG quality, frames per second), from the best picture to the lightest stream
+LEVELS = [
+    (1.0, 95, 30),
+    (1.0, 80, 30),
+    (1.0, 65, 20),
+    (0.8, 60, 15),
+    (0.6, 50, 10),
+    (0.5, 40, 5),
+]
+
+
+class BitrateController:
+    def __init__(self, width, height, quality, fps, degrade_ratio=0.2, upgrade_ratio=0.05, hold_time=2.0,
+                 stable_time=5.0):
+        self.width = width
+        self.height = height
+        self.max_quality = quality
+        self.max_fps = fps
+
+        # share of the sent frames that were lost on the link or dropped by the viewer
+        self.degrade_ratio = degrade_ratio
+        self.upgrade_ratio = upgrade_ratio
+
+        # seconds to wait after a change before degrading again, and of clean feedback before upgrading
+        self.hold_time = hold_time
+        self.stable_time = stable_time
+
+        self.lock = threading.Lock()
+        self.level = 0
+
+        self.sent = 0
+        self.last_sent = 0
+        self.last_received = None
+        self.last_change = time.monotonic()
+        self.stable_since = time.monotonic()
+
+    def frame_sent(self):
+        with self.lock:
+            self.sent += 1
+
+    def settings(self):
+        with self.lock:
+            scale, quality, fps = LEVELS[self.level]
+
+        width, height = self.scaled(self.width, self.height)
+
+        return width, height, min(quality, self.max_quality), min(fps, self.max_fps)
+
+    def scaled(self, width, height):
+        with self.lock:
+            scale = LEVELS[self.level][0]
+
+        # frame sizes stay even for the encoder
+        return int(width * scale) // 2 * 2, int(height * scale) // 2 * 2
+
+    def feedback(self, processed, dropped):
+        now = time.monotonic()
+
+        with self.lock:
+            # the viewer counts every frame it received, either processed or replaced by a newer one
+            received = processed + dropped
+
+            if self.last_received is None or received < self.last_received[0]:
+                # first report or the viewer restarted
+                self.last_received = (received, dropped)
+                self.last_sent = self.sent
+                return
+
+            sent = self.sent - self.last_sent
+            lost = max(sent - (received - self.last_received[0]), 0) + dropped - self.last_received[1]
+
+            self.last_received = (received, dropped)
+            self.last_sent = self.sent
+
+            if sent == 0:
+                return
+
+            ratio = lost / sent
+
+            if ratio > self.degrade_ratio:
+                self.stable_since = now
+
+                if self.level < len(LEVELS) - 1 and now - self.last_change > self.hold_time:
+                    self.level += 1
+                    self.last_change = now
+
+            elif ratio > self.upgrade_ratio:
+                self.stable_since = now
+
+            elif self.level > 0 and now - self.stable_since > self.stable_time:
+                self.level -= 1
+                self.last_change = now
+                self.stable_since = now
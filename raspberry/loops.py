@@ -0,0 +1,71 @@
+import threading
+import time
+
+
+class LatestValue:
+    # slot shared between threads, a new value replaces the previous one whether it was read or not
+    def __init__(self, value):
+        self.lock = threading.Lock()
+        self.value = value
+
+    def set(self, value):
+        with self.lock:
+            self.value = value
+
+    def get(self):
+        with self.lock:
+            return self.value
+
+
+class RateLoop:
+    def __init__(self, name, rate, stats_period):
+        self.name = name
+
+        # None leaves the pace to the step itself, e.g. a blocking capture
+        self.rate = rate
+        self.stats_period = stats_period
+
+        self.last_start = None
+        self.report_start = time.perf_counter()
+        self.intervals = []
+
+    def tick(self):
+        now = time.perf_counter()
+
+        if self.last_start is not None:
+            self.intervals.append(now - self.last_start)
+
+        self.last_start = now
+
+        if now - self.report_start < self.stats_period or not self.intervals:
+            return
+
+        # jitter is the standard deviation of the time between two iterations
+        mean = sum(self.intervals) / len(self.intervals)
+        jitter = (sum((interval - mean) ** 2 for interval in self.intervals) / len(self.intervals)) ** 0.5
+        target = ' (target {:.1f})'.format(self.rate) if self.rate else ''
+
+        print('[INFO] {} loop {:.1f} Hz{} | jitter {:.2f} ms | max {:.1f} ms'.format(
+            self.name, 1.0 / mean, target, jitter * 1000, max(self.intervals) * 1000))
+
+        self.report_start = now
+        self.intervals = []
+
+    def run(self, step):
+        next_tick = time.perf_counter()
+
+        while True:
+            self.tick()
+            step()
+
+            if not self.rate:
+                continue
+
+            # fixed rate, a late iteration does not make the next ones come sooner
+            next_tick += 1.0 / self.rate
+            delay = next_tick - time.perf_counter()
+
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                next_tick = time.perf_counter()
@@ -1,3 +1,6 @@
+import struct
+import threading
+
 from dynamixel_sdk import *
 
 MODEL_NUMBER = 0
@@ -67,6 +70,12 @@ CMD_VELOCITY_ANGULAR_Z = 170
 PROFILE_ACCELERATION_LEFT = 174
 PROFILE_ACCELERATION_RIGHT = 178
 
+# IMU_ANGULAR_VELOCITY_X to PRESENT_POSITION_RIGHT read in one transaction: 13 float32 IMU values, 8 unused bytes, then
+# the int32 present current, velocity and position of the left and right wheels
+TELEMETRY_ADDR = IMU_ANGULAR_VELOCITY_X
+TELEMETRY_LENGTH = PRESENT_POSITION_RIGHT + 4 - IMU_ANGULAR_VELOCITY_X
+TELEMETRY_FORMAT = struct.Struct('<13f8x6i')
+
 
 class Servo:
     def __init__(self, devicename, protocol_version, baudrate, id):
@@ -78,24 +87,82 @@ class Servo:
         if not self.portHandler.setBaudRate(baudrate):
             raise Exception('Failed to change baudrate')
 
+        # the serial bus is shared by the motor commands and the telemetry reads
+        self.lock = threading.Lock()
+
     def write1ByteTxRx(self, addr, val):
-        dxl_comm_result, dxl_error = self.packetHandler.write1ByteTxRx(self.portHandler, self.id, addr, val)
+        with self.lock:
+            dxl_comm_result, dxl_error = self.packetHandler.write1ByteTxRx(self.portHandler, self.id, addr, val)
         if dxl_comm_result != COMM_SUCCESS:
             print("%s" % self.packetHandler.getTxRxResult(dxl_comm_result))
         elif dxl_error != 0:
             print("%s" % self.packetHandler.getRxPacketError(dxl_error))
 
     def write2ByteTxRx(self, addr, val):
-        dxl_comm_result, dxl_error = self.packetHandler.write2ByteTxRx(self.portHandler, self.id, addr, val)
+        with self.lock:
+            dxl_comm_result, dxl_error = self.packetHandler.write2ByteTxRx(self.portHandler, self.id, addr, val)
         if dxl_comm_result != COMM_SUCCESS:
             print("%s" % self.packetHandler.getTxRxResult(dxl_comm_result))
         elif dxl_error != 0:
             print("%s" % self.packetHandler.getRxPacketError(dxl_error))
 
     def write4ByteTxRx(self, addr, val):
-        dxl_comm_result, dxl_error = self.packetHandler.write4ByteTxRx(self.portHandler, self.id, addr, val)
+        with self.lock:
+            dxl_comm_result, dxl_error = self.packetHandler.write4ByteTxRx(self.portHandler, self.id, addr, val)
+        if dxl_comm_result != COMM_SUCCESS:
+            print("%s" % self.packetHandler.getTxRxResult(dxl_comm_result))
+        elif dxl_error != 0:
+            print("%s" % self.packetHandler.getRxPacketError(dxl_error))
+
+    def writeBlock(self, addr, data, response=True):
+        # one packet for a whole block of contiguous registers, without waiting for the status packet if response
+        # is False
+        with self.lock:
+            if response:
+                dxl_comm_result, dxl_error = self.packetHandler.writeTxRx(self.portHandler, self.id, addr, len(data),
+                                                                          data)
+            else:
+                dxl_comm_result = self.packetHandler.writeTxOnly(self.portHandler, self.id, addr, len(data), data)
+                dxl_error = 0
+
+        if dxl_comm_result != COMM_SUCCESS:
+            print("%s" % self.packetHandler.getTxRxResult(dxl_comm_result))
+        elif dxl_error != 0:
+            print("%s" % self.packetHandler.getRxPacketError(dxl_error))
+
+    def write4ByteBlock(self, addr, values, response=True):
+        data = []
+        for val in values:
+            data += [DXL_LOBYTE(DXL_LOWORD(val)), DXL_HIBYTE(DXL_LOWORD(val)),
+                     DXL_LOBYTE(DXL_HIWORD(val)), DXL_HIBYTE(DXL_HIWORD(val))]
+
+        self.writeBlock(addr, data, response)
+
+    def writeVelocity(self, linear, angular, response=True):
+        # CMD_VELOCITY_LINEAR_X to CMD_VELOCITY_ANGULAR_Z are contiguous 4 byte registers
+        self.write4ByteBlock(CMD_VELOCITY_LINEAR_X, [int(v) for v in linear + angular], response)
+
+    def readBlock(self, addr, length):
+        with self.lock:
+            data, dxl_comm_result, dxl_error = self.packetHandler.readTxRx(self.portHandler, self.id, addr, length)
+
         if dxl_comm_result != COMM_SUCCESS:
             print("%s" % self.packetHandler.getTxRxResult(dxl_comm_result))
+            return None
         elif dxl_error != 0:
             print("%s" % self.packetHandler.getRxPacketError(dxl_error))
+            return None
+
+        # the status packet of a write sent without response can be read instead of ours, it carries no data
+        if len(data) != length:
+            return None
+
+        return bytes(data)
+
+    def readTelemetry(self):
+        data = self.readBlock(TELEMETRY_ADDR, TELEMETRY_LENGTH)
+
+        if data is None:
+            return None
 
+        return TELEMETRY_FORMAT.unpack(data)
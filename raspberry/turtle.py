@@ -1,17 +1,19 @@
-import imutils
+import argparse
 import time
 import cv2
-import json
 import random
+import threading
 import zenoh
 import io
 
 from dataclasses import dataclass
 
 from servo import *
+from bitrate import BitrateController
+from loops import LatestValue, RateLoop
 
 from pycdr2 import IdlStruct
-from pycdr2.types import int8, int32, uint32, float64
+from pycdr2.types import int8, int32, uint32, float32, float64, array
 
 @dataclass
 class Vector3(IdlStruct, typename="Vector3"):
@@ -24,28 +26,153 @@ class Twist(IdlStruct, typename="Twist"):
     linear: Vector3
     angular: Vector3
 
+@dataclass
+class CameraFeedback(IdlStruct, typename="CameraFeedback"):
+    processed: uint32
+    dropped: uint32
+    fps: float32
+
+# fixed layout copy of the telemetry register block, IMU in the units of the motor controller
+@dataclass
+class Telemetry(IdlStruct, typename="Telemetry"):
+    stamp: float64
+    angular_velocity: array[float32, 3]
+    linear_acceleration: array[float32, 3]
+    magnetic: array[float32, 3]
+    orientation: array[float32, 4]
+    present_current: array[int32, 2]
+    present_velocity: array[int32, 2]
+    present_position: array[int32, 2]
+
 DEVICENAME                  = '/dev/ttyACM0'
 PROTOCOL_VERSION            = 2.0
 BAUDRATE                    = 115200
 MOTOR_ID                    = 200
 
 def listener(sample):
-    global cmd
-    
-    cmd_json = json.loads (sample.payload.decode ("utf-8"))
-    cmd_str = cmd_json[0]
-    cmd_value = float(cmd_json[1])
-    
-    if cmd_str == "Rotate":
-        cmd.angular.z = cmd_value     
-    elif cmd_str == "Forward":
-        cmd.linear.x = cmd_value
-    else:
-        print("not recnognizable")
+    # one Twist per command, linear and angular velocities are replaced together
+    twist = Twist.deserialize(sample.payload)
 
-from picamera2 import Picamera2
+    cmd.set(((twist.linear.x, twist.linear.y, twist.linear.z), (twist.angular.x, twist.angular.y, twist.angular.z)))
+
+def camera_feedback_listener(sample):
+    feedback = CameraFeedback.deserialize(sample.payload)
+
+    if args.adaptive:
+        bitrate.feedback(feedback.processed, feedback.dropped)
+
+def write_motor():
+    global count
+
+    # only the newest command is written, the ones received since the last write are dropped
+    linear, angular = cmd.get()
+
+    servo.writeBlock(HEARTBEAT, [count], args.motor_response)
+    servo.writeVelocity(linear, angular, args.motor_response)
+
+    count = (count + 1) % 256
+
+def publish_telemetry():
+    values = servo.readTelemetry()
+
+    if values is None:
+        return
+
+    telemetry = Telemetry(time.time(), list(values[0:3]), list(values[3:6]), list(values[6:9]), list(values[9:13]),
+                          list(values[13:15]), list(values[15:17]), list(values[17:19]))
+
+    telemetry_publisher.put(telemetry.serialize())
+
+def camera_step():
+    global width, height, quality, fps, detect_width, detect_height, next_frame, next_display_frame
+
+    settings = bitrate.settings()
+
+    if settings[:2] != (width, height):
+        print('[INFO] Camera stream set to {}x{}'.format(*settings[:2]))
+        picam2.stop ()
+        detect_width, detect_height = configure_camera(settings[:2],
+                                                       bitrate.scaled(args.detect_width, args.detect_height))
+        picam2.start ()
+
+    width, height, quality, fps = settings
+    jpeg_opts = [int(cv2.IMWRITE_JPEG_QUALITY), quality]
+
+    # the capture paces the loop, frames are only encoded and published at the current rates
+    start = time.perf_counter()
+    (frame, yuv), _ = picam2.capture_arrays (['main', 'lores'])
+    captured = time.perf_counter()
+
+    if captured >= next_frame:
+        next_frame = max(next_frame + 1.0 / fps, captured)
+
+        _, jpeg = cv2.imencode('.jpg', yuv[:detect_height, :detect_width], jpeg_opts)
+        encoded = time.perf_counter()
+
+        z.put('turtle/camera/detect', jpeg.tobytes())
+        published = time.perf_counter()
 
-jpeg_opts = [int(cv2.IMWRITE_JPEG_QUALITY), 95]
+        bitrate.frame_sent()
+
+        timings.add('capture', captured - start)
+        timings.add('encode detect', encoded - captured)
+        timings.add('publish detect', published - encoded)
+
+        if captured >= next_display_frame:
+            next_display_frame = max(next_display_frame + 1.0 / min(args.display_fps, fps), captured)
+
+            _, jpeg = cv2.imencode('.jpg', frame, jpeg_opts)
+            encoded = time.perf_counter()
+
+            z.put('turtle/camera/display', jpeg.tobytes())
+
+            timings.add('encode display', encoded - published)
+            timings.add('publish display', time.perf_counter() - encoded)
+
+        timings.frame()
+
+class StageTimings:
+    def __init__(self, period):
+        self.period = period
+        self.start = time.perf_counter()
+        self.frames = 0
+        self.totals = {}
+
+    def add(self, stage, duration):
+        self.totals[stage] = self.totals.get(stage, 0.0) + duration
+
+    def frame(self):
+        self.frames += 1
+
+        elapsed = time.perf_counter() - self.start
+        if elapsed < self.period:
+            return
+
+        stages = ' | '.join('{} {:.1f} ms'.format(stage, total / self.frames * 1000) for stage, total in self.totals.items())
+        print('[INFO] {:.1f} fps | {}'.format(self.frames / elapsed, stages))
+
+        self.start = time.perf_counter()
+        self.frames = 0
+        self.totals = {}
+
+parser = argparse.ArgumentParser(description='Turtle camera and motor node')
+parser.add_argument('--width', type=int, default=400, help='display stream frame width in pixels')
+parser.add_argument('--height', type=int, default=300, help='display stream frame height in pixels')
+parser.add_argument('--detect-width', type=int, default=320, help='detection stream frame width in pixels')
+parser.add_argument('--detect-height', type=int, default=240, help='detection stream frame height in pixels')
+parser.add_argument('--quality', type=int, default=95, help='JPEG encode quality, 0 to 100')
+parser.add_argument('--fps', type=int, default=30, help='maximum published detection frames per second')
+parser.add_argument('--display-fps', type=int, default=10, help='maximum published display frames per second')
+parser.add_argument('--no-adaptive', dest='adaptive', action='store_false',
+                    help='keep size, quality and frame rate fixed instead of following the viewer feedback')
+parser.add_argument('--no-motor-response', dest='motor_response', action='store_false',
+                    help='send motor commands without waiting for the status packets')
+parser.add_argument('--motor-rate', type=float, default=30.0, help='motor command writes per second')
+parser.add_argument('--telemetry-rate', type=float, default=50.0, help='telemetry reads published per second')
+parser.add_argument('--stats-period', type=float, default=5.0, help='seconds between two timing reports')
+args = parser.parse_args()
+
+from picamera2 import Picamera2
 
 print('[INFO] Open zenoh session...')
 
@@ -55,11 +182,30 @@ z = zenoh.open(conf)
 
 print('[INFO] Start video stream - Cam #{}'.format(0))
 
+# Two streams leave the ISP already at their target size, no resize is left to the CPU: the color main stream for
+# display, and the YUV420 lores stream whose Y plane is the grayscale frame used for detection.
+def configure_camera(size, detect_size):
+    picam2.configure (picam2.create_video_configuration(main={'size': size, 'format': 'BGR888'},
+                                                        lores={'size': detect_size, 'format': 'YUV420'}))
+
+    return picam2.camera_configuration()['lores']['size']
+
+# JPEG quality, frame size and frame rate follow the detection frames processed and dropped by the viewer
+bitrate = BitrateController(args.width, args.height, args.quality, args.fps)
+width, height, quality, fps = bitrate.settings()
+
 picam2 = Picamera2()
-picam2.configure (picam2.create_still_configuration({'format': 'BGR888'}))
+detect_width, detect_height = configure_camera((width, height), bitrate.scaled(args.detect_width, args.detect_height))
 picam2.start ()
 
-cmd = Twist(Vector3(0.0, 0.0, 0.0), Vector3(0.0, 0.0, 0.0))
+feedback_sub = z.declare_subscriber('turtle/camera/feedback', camera_feedback_listener)
+
+timings = StageTimings(args.stats_period)
+next_frame = time.perf_counter()
+next_display_frame = time.perf_counter()
+
+# latest (linear, angular) velocity received on cmd_vel
+cmd = LatestValue(((0.0, 0.0, 0.0), (0.0, 0.0, 0.0)))
 count = 0
 
 print('[INFO] Connect to motor...')
@@ -70,30 +216,19 @@ if servo is None:
 else:
     servo.write1ByteTxRx(IMU_RE_CALIBRATION, 1)
     sub = z.declare_subscriber('turtle/cmd_vel', listener)
+    telemetry_publisher = z.declare_publisher('turtle/telemetry')
 
 time.sleep(3.0)
 
-while True:
-    raw = picam2.capture_array ()
-    frame = imutils.resize(raw, width=400)
-
-    _, jpeg = cv2.imencode('.jpg', frame, jpeg_opts)
-
-    z.put('turtle/camera', jpeg.tobytes())
-    
-    if servo is not None:
-        servo.write1ByteTxRx(HEARTBEAT, count)
-        servo.write4ByteTxRx(CMD_VELOCITY_LINEAR_X, int(cmd.linear.x))
-        servo.write4ByteTxRx(CMD_VELOCITY_LINEAR_Y, int(cmd.linear.y))
-        servo.write4ByteTxRx(CMD_VELOCITY_LINEAR_Z, int(cmd.linear.z))
-        servo.write4ByteTxRx(CMD_VELOCITY_ANGULAR_X, int(cmd.angular.x))
-        servo.write4ByteTxRx(CMD_VELOCITY_ANGULAR_Y, int(cmd.angular.y))
-        servo.write4ByteTxRx(CMD_VELOCITY_ANGULAR_Z, int(cmd.angular.z))
-        
-        count += 1
-        
-        if count > 255:
-            count = 0
-	
+if servo is not None:
+    # the motor and telemetry loops keep their own rates, whatever the time the camera spends encoding
+    threading.Thread(target=RateLoop('motor', args.motor_rate, args.stats_period).run, args=(write_motor,),
+                     daemon=True).start()
+    threading.Thread(target=RateLoop('telemetry', args.telemetry_rate, args.stats_period).run,
+                     args=(publish_telemetry,), daemon=True).start()
+
+# the capture paces the camera loop
+RateLoop('camera', None, args.stats_period).run(camera_step)
+
 vs.stop()
 z.close()